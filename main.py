@@ -1,28 +1,39 @@
 import os
 import uuid
+import hashlib
+import gzip
+import itertools
 import shutil
 import asyncio
+import anyio.to_thread
 import aiofiles
 import tarfile
 import tempfile
-import requests
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import httpx
 from pathlib import Path
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request, BackgroundTasks, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import Distance, VectorParams, ScalarQuantization, ScalarQuantizationConfig, ScalarType
+from qdrant_client.models import OptimizersConfigDiff, HnswConfigDiff, CollectionStatus, Datatype
 import subprocess
 import logging
 from typing import List
-import json
+import orjson
+import numpy as np
 from datetime import datetime, timezone
-from huggingface_hub import HfApi
+from huggingface_hub import HfApi, CommitOperationAdd
 import time
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from contextvars import ContextVar
 from dotenv import load_dotenv
 from sse_starlette.sse import EventSourceResponse
+from streaming_form_data import StreamingFormDataParser, ParseFailedException
+from streaming_form_data.targets import DirectoryTarget, ValueTarget
 import paramiko
 from typing import Dict
 import re
@@ -36,25 +47,26 @@ IS_DIGITAL_OCEAN = os.environ.get('DIGITALOCEAN_APP_ID') is not None
 
 if IS_DIGITAL_OCEAN:
     print("🚀 Running on DigitalOcean App Platform")
-    # Ensure models directory exists
-    MODEL_DIR = Path("/app/models")
-    MODEL_DIR.mkdir(exist_ok=True)
     
-    # Update paths for DigitalOcean
+    # Update paths for DigitalOcean (created at startup by ensure_directories)
+    MODEL_DIR = Path("/app/models")
     UPLOAD_DIR = Path("/tmp/uploads")
     EMBEDDING_DIR = Path("/tmp/embeddings")
     SNAPSHOT_DIR = Path("/tmp/snapshots")
     WASM_DIR = Path("/app/wasm")
-    
-    # Create directories
-    for directory in [UPLOAD_DIR, EMBEDDING_DIR, SNAPSHOT_DIR, WASM_DIR]:
-        directory.mkdir(exist_ok=True, parents=True)
         
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 templates = Jinja2Templates(directory="templates")
 
+# Landing page is read once at import and revalidated by ETag
+ROOT_HTML = (Path(__file__).parent / "static" / "index.html").read_bytes()
+ROOT_HTML_ETAG = f'"{hashlib.blake2b(ROOT_HTML, digest_size=8).hexdigest()}"'
+ROOT_HTML_GZIP = gzip.compress(ROOT_HTML, compresslevel=9, mtime=0)
+# /static names carry no content hash, so browsers cache them for a day and then revalidate by ETag
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "86400"))
+
 
 # Configuration
 UPLOAD_DIR = Path("uploads")
@@ -63,11 +75,57 @@ SNAPSHOT_DIR = Path("snapshots")
 WASM_DIR = Path("wasm")
 MODEL_DIR = Path("models")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB default
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MiB disk writes for streamed uploads
+# Client-chosen session ids become directory names under UPLOAD_DIR, so only plain names are accepted
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
 COLLECTION_NAME = "default"
+# Collection the current /process request loads; set per request, read by everything it calls
+current_collection: ContextVar[str] = ContextVar("current_collection", default=COLLECTION_NAME)
+# Embedding vectors barely compress, so high gzip levels cost CPU for almost no size gain
+SNAPSHOT_GZIP_LEVEL = int(os.getenv("SNAPSHOT_GZIP_LEVEL", "3"))
+# Multi-threaded gzip, when installed; the archive is still a plain .tar.gz for Gaia
+PIGZ_PATH = shutil.which("pigz")
 VECTOR_SIZE = 1536  # For gte-Qwen2-1.5B model
+# int8 scalar quantization keeps a 4x smaller copy of every vector in RAM for search on the Gaia node
+QDRANT_SCALAR_QUANTIZATION = os.getenv("QDRANT_SCALAR_QUANTIZATION", "true").lower() == "true"
+SCALAR_QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+) if QDRANT_SCALAR_QUANTIZATION else None
+# With the int8 copy in RAM, the full-precision originals can live on disk (mmap) and are only read
+# for rescoring; the setting travels in the snapshot, so the Gaia node restores it the same way
+QDRANT_VECTORS_ON_DISK = QDRANT_SCALAR_QUANTIZATION and os.getenv("QDRANT_VECTORS_ON_DISK", "true").lower() == "true"
+# float16 halves the stored vectors; opt-in since older Qdrant on Gaia nodes only reads float32
+QDRANT_VECTOR_DATATYPE = Datatype(os.getenv("QDRANT_VECTOR_DATATYPE", "float32").lower())
+VECTOR_DTYPE = np.float16 if QDRANT_VECTOR_DATATYPE == Datatype.FLOAT16 else np.float32
+# Monotonic point ids shared by every file loaded into the collection
+point_ids = itertools.count()
+INDEXING_THRESHOLD = 20000  # Qdrant's default, restored after bulk loading
+HNSW_M = 16  # Qdrant's default graph degree, restored after bulk loading
+QDRANT_UPLOAD_BATCH_SIZE = int(os.getenv("QDRANT_UPLOAD_BATCH_SIZE", "1024"))
+# parallel > 1 starts a fresh process pool per upload_collection call (once per file), so it only
+# pays off for uploads large enough to outweigh the process startup
+QDRANT_UPLOAD_PARALLEL = int(os.getenv("QDRANT_UPLOAD_PARALLEL", "1"))
+QDRANT_PARALLEL_MIN_POINTS = int(os.getenv("QDRANT_PARALLEL_MIN_POINTS", "50000"))
+# Files converted/embedded concurrently per request; each WasmEdge run is CPU-bound, so no more than the cores
+FILE_WORKERS = int(os.getenv("FILE_WORKERS", str(min(5, os.cpu_count() or 1))))
+CHECK_WASM_MAX_AGE = 60  # seconds browsers may reuse the /check-wasm answer
+WASMEDGE_BATCH_BYTES = int(os.getenv("WASMEDGE_BATCH_BYTES", str(1 << 20)))  # small .txt uploads merged per WasmEdge run
+# Embedding runs in flight across all sessions; each WasmEdge run loads its own copy of the model
+MAX_EMBED_INFLIGHT = int(os.getenv("MAX_EMBED_INFLIGHT", str(FILE_WORKERS)))
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(max(2, (os.cpu_count() or 2) - 1))))
+# Worker threads for blocking calls: paramiko SSH and the sync Qdrant/HF clients go through asyncio.to_thread
+# (min(32, cores + 4) threads by default), sync endpoints through AnyIO's pool (40 by default)
+THREADPOOL_TOKENS = int(os.getenv("THREADPOOL_TOKENS", "100"))
 HF_DATASET_NAME=os.getenv("HF_DATASET_NAME", "thenocode/gaia-console")
+HF_UPLOAD_RETRIES = int(os.getenv("HF_UPLOAD_RETRIES", "3"))  # attempts for the snapshot transfer before giving up
+# Let the Xet transfer use more concurrent range uploads and larger buffers (hf_transfer's
+# successor); hf_xet reads this when its first transfer starts, so .env can still turn it off
+os.environ.setdefault("HF_XET_HIGH_PERFORMANCE", "1")
+
+ALLOWED_ORIGINS = [origin.strip() for origin in os.getenv("ALLOWED_ORIGIN", "*").split(",")]
 
 # DigitalOcean config
 DO_TOKEN = os.getenv("DO_TOKEN")
@@ -83,25 +141,57 @@ DEPLOYMENTS: Dict[int, dict] = {}
 LOG_STREAMS: Dict[int, asyncio.Queue] = {}
 LOGS: Dict[int, List[str]] = {}
 
-# Create directories
-for directory in [UPLOAD_DIR, EMBEDDING_DIR, SNAPSHOT_DIR, WASM_DIR, MODEL_DIR]:
-    directory.mkdir(exist_ok=True)
+# Working directories are created once at startup, not at import
+def ensure_directories():
+    """Create the working directories; lifespan calls this once before serving"""
+    for directory in (UPLOAD_DIR, EMBEDDING_DIR, SNAPSHOT_DIR, WASM_DIR, MODEL_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
 
 # Global Qdrant client
 qdrant_client = None
 wasmedge_available = False
-progress_events = {}
-
-app = FastAPI()
+progress_events: Dict[str, asyncio.Queue] = {}
+# Last event per running session, kept so a stream that connects after the run can still be answered
+last_progress: Dict[str, bytes] = {}
+# Recently finished sessions (finish time, last event), in finish order
+finished_progress: Dict[str, tuple] = {}
+FINISHED_PROGRESS_TTL = 60  # seconds a finished session is remembered for late subscribers
+SSE_BATCH_WINDOW = 0.05  # seconds spent folding already-queued progress events into one frame
+SSE_PING_INTERVAL = 15  # seconds between keep-alive comments on idle streams
+SSE_PING_FRAME = b": ping\n\n"
+# First frame of every progress stream; constant, so it is encoded once at import
+SSE_INITIAL_FRAME = b"event: message\ndata: " + orjson.dumps([{
+    "percent": 0,
+    "message": "Starting processing...",
+    "step": "Initializing"
+}]) + b"\n\n"
+# What sse_starlette sends for event streams; proxies must not buffer or cache them
+SSE_HEADERS = {"Cache-Control": "no-store", "Connection": "keep-alive", "X-Accel-Buffering": "no"}
+
+# Shared Hugging Face client, reused so HTTP connections stay pooled
+hf_api = None
+
+# Shared async HTTP client for Qdrant and other outbound calls; HTTP/2 is negotiated over TLS
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60)
+http_client = None
+
+# Process pool for CPU-bound text chunking/vectorizing, kept off the event loop and the GIL
+cpu_pool = None
+
+# Shared by every session, so concurrent uploads queue for embedding instead of all running at once
+embed_slots = asyncio.Semaphore(MAX_EMBED_INFLIGHT)
+
+# Background deletions in flight; the loop only holds weak references to tasks
+cleanup_tasks = set()
+
+# Hugging Face checks run after startup; uploads don't depend on their result
+hf_access_verified = False
+dataset_verified = False
+hf_verification_task = None
+
+# MarkItDown converter, built once in whichever process does the PDF conversion
+markitdown_converter = None
 
-# Middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 # Get Hugging Face token from environment
 HF_TOKEN = os.getenv("HF_TOKEN")
 if not HF_TOKEN:
@@ -111,25 +201,44 @@ if not HF_TOKEN:
 async def lifespan(app: FastAPI):
     """Lifespan event handler for FastAPI"""
     # Startup: Initialize services
-    global qdrant_client, wasmedge_available, hf_access_verified, dataset_verified
+    global qdrant_client, wasmedge_available, hf_access_verified, dataset_verified, hf_api, http_client, cpu_pool, hf_verification_task
     
     # Initialize variables
     qdrant_client = None
+    hf_api = HfApi(token=HF_TOKEN) if HF_TOKEN else None
+    http_client = httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=30)
+    # spawn, not fork: the parent already runs gRPC/httpx threads
+    cpu_pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    # Each deploy poll or log fetch holds a worker thread for its whole SSH round-trip, so size both pools up front
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=THREADPOOL_TOKENS))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_TOKENS
     wasmedge_available = False
     hf_access_verified = False
     dataset_verified = False
     
     try:
-        qdrant_client = await initialize_qdrant()
-        wasmedge_available = await check_wasmedge()
-        hf_access_verified = await verify_huggingface_access()
-        dataset_verified = await verify_huggingface_dataset()
+        ensure_directories()
         
-        if not hf_access_verified and HF_TOKEN:
-            logger.warning("Hugging Face token exists but write access could not be verified")
+        # Hugging Face round-trips only feed log warnings, so they finish after the server is accepting
+        hf_verification_task = asyncio.create_task(verify_huggingface_setup())
         
-        if not dataset_verified and HF_DATASET_NAME:
-            logger.warning(f"Target dataset {HF_DATASET_NAME} could not be verified")
+        # Startup checks are independent network/subprocess waits, so overlap them
+        results = await asyncio.gather(
+            initialize_qdrant(),
+            check_wasmedge(),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Startup check failed: {result}")
+        
+        qdrant_client, wasmedge_available = [
+            None if isinstance(result, Exception) else result for result in results
+        ]
+        if qdrant_client is None:
+            logger.warning("Creating in-memory Qdrant client for development")
+            qdrant_client = QdrantClient(":memory:")
+        wasmedge_available = wasmedge_available is True
         
         logger.info("Application started successfully")
         
@@ -143,6 +252,9 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down application...")
     
     try:
+        if hf_verification_task is not None:
+            hf_verification_task.cancel()
+        
         # Clean up Qdrant client if it exists
         if qdrant_client is not None:
             try:
@@ -164,35 +276,101 @@ async def lifespan(app: FastAPI):
             await cleanup_qdrant_collection()
         except Exception as e:
             logger.warning(f"Error cleaning up Qdrant collection: {e}")
+        
+        if http_client is not None:
+            await http_client.aclose()
+        
+        if cpu_pool is not None:
+            cpu_pool.shutdown(wait=False, cancel_futures=True)
             
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
     
     logger.info("Application shutdown complete")
 
-app = FastAPI(title="Gaia Node Knowledge Base Generator", lifespan=lifespan)
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (FastAPI's own ORJSONResponse is deprecated)"""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+class RootPageMiddleware:
+    """Answer GET / from the precomputed page bytes before FastAPI routing runs"""
+    
+    def __init__(self, app):
+        self.app = app
+        base = [
+            (b"content-type", b"text/html; charset=utf-8"),
+            (b"etag", ROOT_HTML_ETAG.encode()),
+            (b"cache-control", b"public, max-age=300"),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        # Header lists per variant are built once; requests only pick one
+        self.not_modified = base
+        self.identity = base + [(b"content-length", str(len(ROOT_HTML)).encode())]
+        self.gzipped = base + [(b"content-encoding", b"gzip"), (b"content-length", str(len(ROOT_HTML_GZIP)).encode())]
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != "/" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        
+        request_headers = dict(scope["headers"])
+        if request_headers.get(b"if-none-match") == ROOT_HTML_ETAG.encode():
+            status, headers, body = 304, self.not_modified, b""
+        elif b"gzip" in request_headers.get(b"accept-encoding", b""):
+            status, headers, body = 200, self.gzipped, ROOT_HTML_GZIP
+        else:
+            status, headers, body = 200, self.identity, ROOT_HTML
+        
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles whose responses carry a Cache-Control header"""
+    
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}"
+        return response
+
+app = FastAPI(title="Gaia Node Knowledge Base Generator", lifespan=lifespan, default_response_class=ORJSONResponse)
 
-# CORS middleware
+# CORS middleware; explicit lists let Starlette answer preflights with fixed headers
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=ALLOWED_ORIGINS,
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
 )
+# Outermost, so the landing page skips CORS and routing entirely
+app.add_middleware(RootPageMiddleware)
 
 # Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
-async def check_wasmedge():
-    """Check if WasmEdge is available and install it if not"""
+async def get_wasmedge_version():
+    """Return the `wasmedge --version` output, or None if the binary is missing or fails"""
     try:
-        # Check if wasmedge is in PATH
-        result = subprocess.run(["wasmedge", "--version"], capture_output=True, text=True)
-        if result.returncode == 0:
-            logger.info(f"WasmEdge found: {result.stdout.strip()}")
-            return True
+        proc = await asyncio.create_subprocess_exec(
+            "wasmedge", "--version",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
     except FileNotFoundError:
-        pass
+        return None
+    stdout, _ = await proc.communicate()
+    if proc.returncode == 0:
+        return stdout.decode().strip()
+    return None
+
+async def check_wasmedge():
+    """Check if WasmEdge is available and install it if not"""
+    # Check if wasmedge is in PATH
+    version = await get_wasmedge_version()
+    if version:
+        logger.info(f"WasmEdge found: {version}")
+        return True
     
     # WasmEdge not found, try to install it
     logger.warning("WasmEdge not found. Attempting to install...")
@@ -202,51 +380,82 @@ async def check_wasmedge():
         export PATH="$HOME/.wasmedge/bin:$PATH"
         """
         
-        result = subprocess.run(install_script, shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
+        proc = await asyncio.create_subprocess_shell(
+            install_script,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await proc.communicate()
+        if proc.returncode == 0:
             # Add WasmEdge to PATH for current process
             wasmedge_path = Path.home() / ".wasmedge" / "bin"
             os.environ["PATH"] = f"{wasmedge_path}:{os.environ['PATH']}"
             
             # Verify installation
-            result = subprocess.run(["wasmedge", "--version"], capture_output=True, text=True)
-            if result.returncode == 0:
-                logger.info(f"WasmEdge installed successfully: {result.stdout.strip()}")
+            version = await get_wasmedge_version()
+            if version:
+                logger.info(f"WasmEdge installed successfully: {version}")
                 return True
             else:
                 logger.error("WasmEdge installation failed")
                 return False
         else:
-            logger.error(f"WasmEdge installation failed: {result.stderr}")
+            logger.error(f"WasmEdge installation failed: {stderr.decode()}")
             return False
             
     except Exception as e:
         logger.error(f"Error installing WasmEdge: {e}")
         return False
 
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive HTTP client, creating it on first use"""
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=30)
+    return http_client
+
 async def initialize_qdrant():
     """Initialize Qdrant connection with retry logic"""
     max_retries = 5
     retry_delay = 3  # seconds
     
+    # Create client with proper authentication; vectors travel as protobuf over gRPC
+    client_config = {
+        "url": QDRANT_URL,
+        "prefer_grpc": True,
+        "grpc_port": QDRANT_GRPC_PORT,
+        "timeout": 60,
+        # Keep REST connections (snapshots, admin calls) warm between requests
+        "limits": HTTP_LIMITS
+    }
+    
+    # Add API key if provided
+    headers = {}
+    if QDRANT_API_KEY:
+        client_config["api_key"] = QDRANT_API_KEY
+        headers["api-key"] = QDRANT_API_KEY
+    
+    # Build the client once (its constructor does a blocking version check); retries only re-probe the server
+    client = await asyncio.to_thread(QdrantClient, **client_config)
+    
     for attempt in range(max_retries):
         try:
-            # Create client with proper authentication
-            client_config = {
-                "url": QDRANT_URL,
-                "prefer_grpc": False
-            }
-            
-            # Add API key if provided
-            if QDRANT_API_KEY:
-                client_config["api_key"] = QDRANT_API_KEY
-            
-            client = QdrantClient(**client_config)
-            
-            # Test connection with a simple operation
-            client.get_collections()
+            # Cheap readiness probe over the shared keep-alive connection
+            response = await get_http_client().get(f"{QDRANT_URL}/readyz", headers=headers)
+            response.raise_for_status()
             
-            logger.info(f"Connected to Qdrant at {QDRANT_URL}")
+            try:
+                # Test connection with a simple operation
+                await asyncio.to_thread(client.get_collections)
+                
+                logger.info(f"Connected to Qdrant at {QDRANT_URL} over gRPC (port {QDRANT_GRPC_PORT})")
+            except Exception as grpc_error:
+                logger.warning(f"gRPC port unreachable, falling back to HTTP: {grpc_error}")
+                client_config["prefer_grpc"] = False
+                client = await asyncio.to_thread(QdrantClient, **client_config)
+                await asyncio.to_thread(client.get_collections)
+                
+                logger.info(f"Connected to Qdrant at {QDRANT_URL}")
             return client
             
         except Exception as e:
@@ -261,26 +470,54 @@ async def initialize_qdrant():
     
     return QdrantClient(":memory:")  # Fallback to in-memory
 
+def get_hf_api() -> HfApi:
+    """Return the shared HfApi client, creating it on first use"""
+    global hf_api
+    if hf_api is None:
+        hf_api = HfApi(token=HF_TOKEN)
+    return hf_api
+
+def get_markitdown() -> "MarkItDown":
+    """Return this process's MarkItDown converter, creating it on first use"""
+    global markitdown_converter
+    if markitdown_converter is None:
+        # Imported here so only the pool process that converts a PDF loads markitdown
+        from markitdown import MarkItDown
+        markitdown_converter = MarkItDown()
+    return markitdown_converter
+
+def token_can_write_dataset(access_token: dict) -> bool:
+    """Check a fine-grained token's scopes for repo.write on HF_DATASET_NAME or its owner"""
+    namespace = HF_DATASET_NAME.split('/')[0]
+    fine_grained = access_token.get('fineGrained', {})
+    for scope in fine_grained.get('scoped', []):
+        entity = scope.get('entity', {})
+        if entity.get('name') in (HF_DATASET_NAME, namespace) and 'repo.write' in scope.get('permissions', []):
+            return True
+    return False
+
 async def verify_huggingface_access():
     """Verify that the token has write access"""
     try:
         if not HF_TOKEN:
             return False
             
-        api = HfApi(token=HF_TOKEN)
+        api = get_hf_api()
         
         # Try to get your user info to verify token works
-        user_info = api.whoami()
+        user_info = await asyncio.to_thread(api.whoami)
         username = user_info.get('name', 'unknown')
         logger.info(f"Hugging Face user: {username}")
         
-        # Try to create a test repo to verify write access
-        test_repo = f"{username}/test_write_access_{int(time.time())}"
-        api.create_repo(repo_id=test_repo, repo_type="dataset", private=True, exist_ok=False)
-        api.delete_repo(repo_id=test_repo, repo_type="dataset")
+        # The token's role comes back with whoami, so no write probe is needed
+        access_token = user_info.get('auth', {}).get('accessToken', {})
+        role = access_token.get('role')
+        if role == 'write' or (role == 'fineGrained' and token_can_write_dataset(access_token)):
+            logger.info("✓ Token has write access confirmed")
+            return True
         
-        logger.info("✓ Token has write access confirmed")
-        return True
+        logger.warning(f"Token role '{role}' does not grant write access to {HF_DATASET_NAME}")
+        return False
         
     except Exception as e:
         logger.error(f"Token access verification failed: {e}")
@@ -292,17 +529,29 @@ async def verify_huggingface_dataset():
         if not HF_TOKEN or not HF_DATASET_NAME:
             return False
             
-        api = HfApi(token=HF_TOKEN)
+        api = get_hf_api()
         
         # Try to access the dataset
-        repo_info = api.repo_info(repo_id=HF_DATASET_NAME, repo_type="dataset")
+        repo_info = await asyncio.to_thread(api.repo_info, repo_id=HF_DATASET_NAME, repo_type="dataset")
         logger.info(f"✓ Dataset accessible: {HF_DATASET_NAME}")
         
-        # Try to check if snapshots folder exists by listing files
+        # Skip the listing when this revision was already checked
+        marker = MODEL_DIR / f"dataset_{repo_info.sha}.ok"
+        if repo_info.sha and marker.exists():
+            logger.info(f"✓ Snapshots folder already verified at revision {repo_info.sha[:8]}")
+            return True
+        
+        # Try to check if snapshots folder exists by listing only that folder
         try:
-            files = api.list_repo_files(repo_id=HF_DATASET_NAME, repo_type="dataset")
-            snapshots_exists = any(f.startswith("snapshots/") for f in files)
+            entries = await asyncio.to_thread(
+                api.list_repo_tree, repo_id=HF_DATASET_NAME, path_in_repo="snapshots", repo_type="dataset"
+            )
+            snapshots_exists = await asyncio.to_thread(lambda: next(iter(entries), None) is not None)
             if snapshots_exists:
+                if repo_info.sha:
+                    for stale in MODEL_DIR.glob("dataset_*.ok"):
+                        stale.unlink(missing_ok=True)
+                    marker.touch()
                 logger.info("✓ Snapshots folder exists in dataset")
             else:
                 logger.info("ℹ Snapshots folder doesn't exist yet - will be created on first upload")
@@ -315,822 +564,20 @@ async def verify_huggingface_dataset():
         logger.error(f"Dataset verification failed: {HF_DATASET_NAME} - {e}")
         return False
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    """Return the main HTML interface"""
-    html_content = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Gaia Node Knowledge Base Snapshot Generator</title>
-        <script src="https://cdn.tailwindcss.com"></script>
-        <script>
-            tailwind.config = {
-                theme: {
-                    extend: {
-                        colors: {
-                            primary: {
-                                50: '#eff6ff',
-                                100: '#dbeafe',
-                                500: '#3b82f6',
-                                600: '#2563eb',
-                                700: '#1d4ed8',
-                                900: '#1e3a8a',
-                            }
-                        }
-                    }
-                }
-            }
-        </script>
-        <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-        <style>
-            body {
-                font-family: 'Inter', sans-serif;
-                background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-            }
-            
-            .card {
-                backdrop-filter: blur(10px);
-                border: 1px solid rgba(255, 255, 255, 0.2);
-            }
-            
-            .feature-card {
-                transition: all 0.3s ease;
-                border: 1px solid #e5e7eb;
-            }
-            
-            .feature-card:hover {
-                transform: translateY(-4px);
-                box-shadow: 0 20px 25px -5px rgba(0, 0, 0, 0.1), 0 10px 10px -5px rgba(0, 0, 0, 0.04);
-            }
-            
-            .gradient-bg {
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            }
-            
-            .drop-zone-gradient {
-                background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-                border: 2px dashed #d1d5db;
-            }
-            
-            .drop-zone-gradient.dragover {
-                background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%);
-                border-color: #3b82f6;
-            }
-            .toast {
-                position: fixed;
-                bottom: 20px;
-                right: 20px;
-                background: #1f2937;
-                color: white;
-                padding: 12px 16px;
-                border-radius: 8px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                z-index: 1000;
-                animation: slideIn 0.3s ease-out;
-            }
-            .deployment-status {
-                transition: all 0.3s ease;
-            }
-
-            .deployment-status.success {
-                background: linear-gradient(135deg, #d1fae5 0%, #a7f3d0 100%);
-                border-color: #34d399;
-            }
-
-            .deployment-status.error {
-                background: linear-gradient(135deg, #fee2e2 0%, #fecaca 100%);
-                border-color: #f87171;
-            }
-            @keyframes slideIn {
-                from {
-                    transform: translateX(100%);
-                    opacity: 0;
-                }
-                to {
-                    transform: translateX(0);
-                    opacity: 1;
-                }
-            }
-        </style>
-    </head>
-    <body class="min-h-screen">
-        <div class="min-h-screen flex items-center justify-center py-12 px-4 sm:px-6 lg:px-8">
-            <div class="max-w-4xl w-full space-y-8">
-                <!-- Header -->
-                <div class="text-center">
-                    <div class="flex items-center justify-center mb-6">
-                        <img src="/static/logo.png" alt="Gaia Node" class="h-12 w-auto">
-                    </div>
-                    <h1 class="text-3xl font-bold text-gray-900 mb-2">Knowledge Snapshot Generator</h1>
-                    <p class="text-gray-600">Create intelligent knowledge snapshots for your Gaia Node deployment</p>
-                </div>
-
-                <!-- Main Upload Card -->
-                <div class="bg-white rounded-xl shadow-lg p-6 card">
-                    <div id="wasmWarning" class="bg-yellow-50 border-l-4 border-yellow-400 p-4 mb-6 rounded hidden">
-                        <div class="flex">
-                            <div class="flex-shrink-0">
-                                <i class="fas fa-exclamation-triangle text-yellow-400"></i>
-                            </div>
-                            <div class="ml-3">
-                                <p class="text-sm text-yellow-700">
-                                    <strong>Performance Note:</strong> WasmEdge is not available. Using fallback embedding generation.
-                                </p>
-                            </div>
-                        </div>
-                    </div>
-
-                    <div class="drop-zone-gradient rounded-lg p-8 text-center cursor-pointer transition-all duration-200 mb-6" id="dropZone">
-                        <div class="text-primary-600 text-4xl mb-3">
-                            <i class="fas fa-cloud-upload-alt"></i>
-                        </div>
-                        <p class="text-gray-600 font-medium">Drag & drop your files here</p>
-                        <p class="text-sm text-gray-500 mt-1">or click to browse (TXT, MD, PDF, CSV)</p>
-                        <p class="text-xs text-gray-400 mt-2">Max 10MB per file</p>
-                        <input type="file" id="fileInput" multiple class="hidden">
-                    </div>
-
-                    <div id="fileList" class="space-y-3 mb-6"></div>
-
-                    <button id="processBtn" class="w-full bg-primary-600 hover:bg-primary-700 text-white py-3 px-4 rounded-lg font-semibold shadow-md hover:shadow-lg transition-all duration-200 disabled:opacity-50 disabled:cursor-not-allowed flex items-center justify-center" disabled>
-                        <i class="fas fa-bolt mr-2"></i>
-                        Generate Snapshot
-                    </button>
-
-                    <!-- Progress Section -->
-                    <div id="progressSection" class="hidden mt-6">
-                        <div class="bg-gray-50 rounded-lg p-6">
-                            <h3 class="text-lg font-semibold text-gray-800 mb-4">Processing Progress</h3>
-                            <div class="w-full bg-gray-200 rounded-full h-2 mb-4">
-                                <div id="progressFill" class="bg-primary-600 h-2 rounded-full transition-all duration-500" style="width: 0%"></div>
-                            </div>
-                            <p id="progressText" class="text-gray-700 mb-4">Starting snapshot generation...</p>
-                            <div class="bg-white rounded-lg p-4 max-h-48 overflow-y-auto">
-                                <div id="stepDetails" class="space-y-1 text-sm text-gray-600"></div>
-                            </div>
-                        </div>
-                    </div>
-
-                    <!-- Result Section -->
-                    <div id="resultSection" class="hidden mt-6">
-                        <div class="bg-green-50 border border-green-200 rounded-lg p-6">
-                            <div class="flex items-start">
-                                <div class="flex-shrink-0">
-                                    <i class="fas fa-check-circle text-green-500 text-xl"></i>
-                                </div>
-                                <div class="ml-3 flex-1">
-                                    <h3 class="text-lg font-semibold text-green-800 mb-2">✅ Snapshot Created Successfully!</h3>
-                                    <p class="text-green-700 mb-4">Your Gaia Node snapshot is ready for deployment.</p>
-                                    
-                                    <!-- Snapshot URL -->
-                                    <div class="mb-6">
-                                        <h4 class="font-medium text-gray-900 mb-2">Snapshot URL:</h4>
-                                        <div class="bg-gray-100 p-3 rounded-lg">
-                                            <a id="snapshotUrl" target="_blank" class="text-primary-600 hover:text-primary-800 break-all font-mono text-sm"></a>
-                                        </div>
-                                    </div>
-
-                                    <!-- Usage Instructions -->
-                                    <div class="bg-blue-50 border border-blue-200 rounded-lg p-4 mb-4">
-                                        <h4 class="font-semibold text-blue-800 mb-3">Steps to use this snapshot with your Gaia node:</h4>
-                                        
-                                        <div class="space-y-4">
-                                            <!-- Step 1 -->
-                                            <div class="flex items-start">
-                                                <div class="flex-shrink-0 w-6 h-6 bg-blue-600 rounded-full flex items-center justify-center mt-0.5">
-                                                    <span class="text-white text-xs font-bold">1</span>
-                                                </div>
-                                                <div class="ml-3">
-                                                    <p class="text-sm font-medium text-gray-900 mb-1">Install the Gaia CLI (if not already installed):</p>
-                                                    <div class="bg-gray-900 text-green-400 p-3 rounded-lg font-mono text-sm overflow-x-auto">
-                                                        curl -sSfL 'https://github.com/GaiaNet-AI/gaianet-node/releases/latest/download/install.sh' | bash
-                                                    </div>
-                                                </div>
-                                            </div>
-
-                                            <!-- Step 2 -->
-                                            <div class="flex items-start">
-                                                <div class="flex-shrink-0 w-6 h-6 bg-blue-600 rounded-full flex items-center justify-center mt-0.5">
-                                                    <span class="text-white text-xs font-bold">2</span>
-                                                </div>
-                                                <div class="ml-3">
-                                                    <p class="text-sm font-medium text-gray-900 mb-1">Update the node's configuration:</p>
-                                                    <div class="bg-gray-900 text-green-400 p-3 rounded-lg font-mono text-sm overflow-x-auto" id="configCommand">
-                                                        <!-- This will be populated by JavaScript -->
-                                                    </div>
-                                                </div>
-                                            </div>
-
-                                            <!-- Step 3 -->
-                                            <div class="flex items-start">
-                                                <div class="flex-shrink-0 w-6 h-6 bg-blue-600 rounded-full flex items-center justify-center mt-0.5">
-                                                    <span class="text-white text-xs font-bold">3</span>
-                                                </div>
-                                                <div class="ml-3">
-                                                    <p class="text-sm font-medium text-gray-900 mb-1">Initialize and run the node:</p>
-                                                    <div class="bg-gray-900 text-green-400 p-3 rounded-lg font-mono text-sm overflow-x-auto space-y-2">
-                                                        <div>gaianet init</div>
-                                                        <div>gaianet start</div>
-                                                    </div>
-                                                </div>
-                                            </div>
-                                        </div>
-                                    </div>
-
-                                    <!-- Copy buttons -->
-                                    <div class="flex space-x-3">
-                                        <button onclick="copySnapshotUrl()" class="flex items-center px-4 py-2 bg-primary-600 hover:bg-primary-700 text-white rounded-lg text-sm">
-                                            <i class="fas fa-copy mr-2"></i> Copy URL
-                                        </button>
-                                        <button onclick="copyConfigCommand()" class="flex items-center px-4 py-2 bg-gray-600 hover:bg-gray-700 text-white rounded-lg text-sm">
-                                            <i class="fas fa-terminal mr-2"></i> Copy Config Command
-                                        </button>
-                                        <button id="deploy-do" class="hidden flex items-center px-4 py-2 bg-blue-600 hover:bg-blue-700 text-white rounded-lg text-sm">
-                                            <i class="fas fa-cloud mr-2"></i> Deploy to DigitalOcean
-                                        </button>
-                                    </div>
-
-                                    <div id="deploymentStatus" class="hidden mt-4">
-                                        <div class="bg-blue-50 border border-blue-200 rounded-lg p-4">
-                                            <div class="flex items-center">
-                                                <div class="flex-shrink-0">
-                                                    <i class="fas fa-sync-alt fa-spin text-blue-500"></i>
-                                                </div>
-                                                <div class="ml-3">
-                                                    <p class="text-sm font-medium text-blue-800">Deployment in progress...</p>
-                                                    <p class="text-sm text-blue-600">Your Gaia node is being deployed. This may take 5-10 minutes.</p>
-                                                    <p class="text-xs text-blue-500 mt-1">Droplet ID: <span id="currentDropletId"></span></p>
-                                                </div>
-                                            </div>
-                                        </div>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-
-                    <!-- Error Section -->
-                    <div id="errorSection" class="hidden mt-6">
-                        <div class="bg-red-50 border border-red-200 rounded-lg p-4">
-                            <div class="flex">
-                                <div class="flex-shrink-0">
-                                    <i class="fas fa-exclamation-circle text-red-400"></i>
-                                </div>
-                                <div class="ml-3">
-                                    <p id="errorMessage" class="text-sm text-red-700"></p>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-
-                <!-- Information Section -->
-                <div class="bg-white rounded-xl shadow-lg p-6 card">
-                    <h2 class="text-2xl font-bold text-gray-900 mb-6 text-center">How It Works</h2>
-                    
-                    <div class="grid md:grid-cols-3 gap-6 mb-8">
-                        <div class="feature-card bg-white p-6 rounded-lg border">
-                            <div class="text-center mb-4">
-                                <div class="w-12 h-12 bg-primary-100 rounded-full flex items-center justify-center mx-auto">
-                                    <i class="fas fa-file-upload text-primary-600 text-xl"></i>
-                                </div>
-                            </div>
-                            <h3 class="font-semibold text-gray-900 mb-2 text-center">1. Upload Files</h3>
-                            <p class="text-gray-600 text-sm text-center">Upload your knowledge files (TXT, MD, PDF, CSV) with support for multiple formats</p>
-                        </div>
-
-                        <div class="feature-card bg-white p-6 rounded-lg border">
-                            <div class="text-center mb-4">
-                                <div class="w-12 h-12 bg-primary-100 rounded-full flex items-center justify-center mx-auto">
-                                    <i class="fas fa-brain text-primary-600 text-xl"></i>
-                                </div>
-                            </div>
-                            <h3 class="font-semibold text-gray-900 mb-2 text-center">2. AI Processing</h3>
-                            <p class="text-gray-600 text-sm text-center">Uses gte-Qwen2-1.5B model to generate high-quality embeddings with WasmEdge acceleration</p>
-                        </div>
-
-                        <div class="feature-card bg-white p-6 rounded-lg border">
-                            <div class="text-center mb-4">
-                                <div class="w-12 h-12 bg-primary-100 rounded-full flex items-center justify-center mx-auto">
-                                    <i class="fas fa-rocket text-primary-600 text-xl"></i>
-                                </div>
-                            </div>
-                            <h3 class="font-semibold text-gray-900 mb-2 text-center">3. Deploy</h3>
-                            <p class="text-gray-600 text-sm text-center">Get your snapshot URL and deploy instantly to your Gaia Node infrastructure</p>
-                        </div>
-                    </div>
-
-                    <!-- Model Information -->
-                    <div class="bg-gray-50 rounded-lg p-6 mb-6">
-                        <h3 class="text-lg font-semibold text-gray-900 mb-4">Embedding Model</h3>
-                        <div class="flex items-start space-x-4">
-                            <div class="flex-shrink-0">
-                                <div class="w-10 h-10 bg-gradient-to-r from-blue-500 to-purple-600 rounded-full flex items-center justify-center">
-                                    <i class="fas fa-robot text-white"></i>
-                                </div>
-                            </div>
-                            <div>
-                                <h4 class="font-medium text-gray-900">gte-Qwen2-1.5B-instruct</h4>
-                                <p class="text-sm text-gray-600 mt-1">
-                                    State-of-the-art embedding model with 1536-dimensional vectors, optimized for semantic search and knowledge retrieval.
-                                </p>
-                                <ul class="text-sm text-gray-600 mt-2 space-y-1">
-                                    <li><i class="fas fa-check-circle text-green-500 mr-2"></i>1536-dimensional embeddings</li>
-                                    <li><i class="fas fa-check-circle text-green-500 mr-2"></i>Optimized for semantic search</li>
-                                    <li><i class="fas fa-check-circle text-green-500 mr-2"></i>Multi-format document support</li>
-                                </ul>
-                            </div>
-                        </div>
-                    </div>
-
-                    <!-- Best Practices -->
-                    <div class="bg-blue-50 rounded-lg p-6">
-                        <h3 class="text-lg font-semibold text-gray-900 mb-4">Best Practices</h3>
-                        <div class="space-y-3">
-                            <div class="flex items-start">
-                                <div class="flex-shrink-0">
-                                    <i class="fas fa-lightbulb text-yellow-500 mt-1"></i>
-                                </div>
-                                <div class="ml-3">
-                                    <p class="text-sm font-medium text-gray-900">File Preparation</p>
-                                    <p class="text-sm text-gray-600">Clean your documents and ensure proper formatting for optimal embedding quality</p>
-                                </div>
-                            </div>
-                            <div class="flex items-start">
-                                <div class="flex-shrink-0">
-                                    <i class="fas fa-file-alt text-blue-500 mt-1"></i>
-                                </div>
-                                <div class="ml-3">
-                                    <p class="text-sm font-medium text-gray-900">Supported Formats</p>
-                                    <p class="text-sm text-gray-600">TXT (plain text), MD (Markdown), PDF (converted to text), CSV (tabular data)</p>
-                                </div>
-                            </div>
-                            <div class="flex items-start">
-                                <div class="flex-shrink-0">
-                                    <i class="fas fa-database text-green-500 mt-1"></i>
-                                </div>
-                                <div class="ml-3">
-                                    <p class="text-sm font-medium text-gray-900">Batch Processing</p>
-                                    <p class="text-sm text-gray-600">Process multiple related files together for better contextual understanding</p>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-
-                <!-- Footer -->
-                <div class="text-center text-gray-600 text-sm pt-6">
-                    <p>Powered by <a href="https://gaianet.ai" target="_blank" class="text-primary-600 hover:text-primary-800 font-medium">Gaia Network</a> - Open Source AI Infrastructure</p>
-                    <p class="mt-1">Version 1.0.0 | <a href="https://github.com/gaia-network" target="_blank" class="text-primary-600 hover:text-primary-800">GitHub</a> | <a href="https://docs.gaianet.ai" target="_blank" class="text-primary-600 hover:text-primary-800">Documentation</a></p>
-                </div>
-            </div>
-        </div>
-
-        <script>
-            const dropZone = document.getElementById('dropZone');
-            const fileInput = document.getElementById('fileInput');
-            const fileList = document.getElementById('fileList');
-            const processBtn = document.getElementById('processBtn');
-            const progressSection = document.getElementById('progressSection');
-            const progressFill = document.getElementById('progressFill');
-            const progressText = document.getElementById('progressText');
-            const resultSection = document.getElementById('resultSection');
-            const snapshotUrl = document.getElementById('snapshotUrl');
-            const errorSection = document.getElementById('errorSection');
-            const errorMessage = document.getElementById('errorMessage');
-            const wasmWarning = document.getElementById('wasmWarning');
-            const deployButton = document.getElementById('deploy-do');
-
-            let files = [];
-
-            // Check if WasmEdge is available
-            fetch('/check-wasm')
-                .then(response => response.json())
-                .then(data => {
-                    if (!data.available) {
-                        wasmWarning.classList.remove('hidden');
-                    }
-                });
-
-            // Drag and drop handlers
-            dropZone.addEventListener('click', () => fileInput.click());
-
-            dropZone.addEventListener('dragover', (e) => {
-                e.preventDefault();
-                dropZone.classList.add('dragover');
-            });
-
-            dropZone.addEventListener('dragleave', () => {
-                dropZone.classList.remove('dragover');
-            });
-
-            dropZone.addEventListener('drop', (e) => {
-                e.preventDefault();
-                dropZone.classList.remove('dragover');
-                handleFiles(e.dataTransfer.files);
-            });
-
-            fileInput.addEventListener('change', () => {
-                handleFiles(fileInput.files);
-            });
-
-            deployButton.addEventListener('click', async function() {
-                const snapshotUrl = document.getElementById('snapshotUrl').textContent;
-                if (!snapshotUrl) {
-                    showError('No snapshot URL available for deployment');
-                    return;
-                }
-                
-                deployButton.disabled = true;
-                deployButton.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i> Deploying...';
-                
-                // Show deployment status
-                showDeploymentStatus('Starting...');
-                
-                try {
-                    const response = await fetch(`/deploy?snapshot_url=${encodeURIComponent(snapshotUrl)}&user_id=user_${Date.now()}`, {
-                        method: "POST"
-                    });
-                    
-                    if (!response.ok) {
-                        throw new Error('Deployment failed to start');
-                    }
-                    
-                    const data = await response.json();
-                    const dropletId = data.droplet_id;
-                    
-                    showToast('Deployment started! Droplet ID: ' + dropletId);
-                    updateDeploymentStatus('Droplet created. Starting installation...', 'info');
-                    showDeploymentStatus(dropletId);
-                    
-                    // Open deployment status page
-                    const statusWindow = window.open(`/deployment-status?droplet_id=${dropletId}`, '_blank');
-                    
-                    // Poll for deployment completion
-                    const pollInterval = setInterval(async () => {
-                        try {
-                            const response = await fetch(`/status/${dropletId}`);
-                            const statusData = await response.json();
-                            
-                            // Update status message
-                            if (statusData.status) {
-                                updateDeploymentStatus(`Status: ${statusData.status}${statusData.ip ? ', IP: ' + statusData.ip : ''}`, 'info');
-                            }
-                            
-                            if (statusData.gaia_url) {
-                                // Deployment completed successfully!
-                                clearInterval(pollInterval);
-                                
-                                deployButton.disabled = false;
-                                deployButton.innerHTML = '<i class="fas fa-check mr-2"></i> Deployment Complete';
-                                deployButton.classList.remove('bg-blue-600', 'hover:bg-blue-700');
-                                deployButton.classList.add('bg-green-600', 'hover:bg-green-700');
-                                
-                                updateDeploymentStatus('Deployment completed successfully!', 'success');
-                                
-                                // Show the Gaia URL
-                                const gaiaUrl = statusData.gaia_url;
-                                snapshotUrl.href = gaiaUrl;
-                                snapshotUrl.textContent = gaiaUrl;
-                                
-                                // Create open button
-                                const openButton = document.createElement('button');
-                                openButton.className = 'ml-4 px-4 py-2 bg-primary-600 hover:bg-primary-700 text-white rounded-lg';
-                                openButton.innerHTML = '<i class="fas fa-external-link-alt mr-2"></i> Open Gaia Node';
-                                openButton.onclick = () => window.open(gaiaUrl, '_blank');
-                                
-                                deployButton.parentNode.appendChild(openButton);
-                                
-                                // Also update the status window if it's still open
-                                if (statusWindow && !statusWindow.closed) {
-                                    statusWindow.location.reload();
-                                }
-                            }
-                            
-                        } catch (error) {
-                            console.error('Error polling deployment status:', error);
-                        }
-                    }, 5000); // Check every 5 seconds
-                    
-                    // Set a timeout to stop polling after 15 minutes
-                    setTimeout(() => {
-                        clearInterval(pollInterval);
-                        if (deployButton.disabled) {
-                            deployButton.disabled = false;
-                            deployButton.innerHTML = '<i class="fas fa-cloud mr-2"></i> Deploy to DigitalOcean';
-                            updateDeploymentStatus('Deployment timed out after 15 minutes. Check the status window for details.', 'error');
-                        }
-                    }, 15 * 60 * 1000); // 15 minutes
-                    
-                } catch (error) {
-                    showError('Deployment failed: ' + error.message);
-                    deployButton.disabled = false;
-                    deployButton.innerHTML = '<i class="fas fa-cloud mr-2"></i> Deploy to DigitalOcean';
-                    hideDeploymentStatus();
-                }
-            });
-            
-            // Show deploy button when snapshot is ready
-            function showDeployButton() {
-                deployButton.classList.remove('hidden');
-            }
-            
-            function handleFiles(fileList) {
-                for (let i = 0; i < fileList.length; i++) {
-                    const file = fileList[i];
-                    
-                    // Check file size (10MB limit)
-                    if (file.size > 10 * 1024 * 1024) {
-                        showError(`File ${file.name} exceeds 10MB limit`);
-                        continue;
-                    }
-                    
-                    // Check file type
-                    const ext = file.name.split('.').pop().toLowerCase();
-                    if (!['txt', 'md', 'pdf', 'csv'].includes(ext)) {
-                        showError(`File type ${ext} not supported. Please use TXT, MD, PDF, or CSV files.`);
-                        continue;
-                    }
-                    
-                    // Add to files list
-                    if (!files.some(f => f.name === file.name && f.size === file.size)) {
-                        files.push(file);
-                        addFileToList(file);
-                    }
-                }
-                
-                updateProcessButton();
-            }
-
-            function addFileToList(file) {
-                const fileItem = document.createElement('div');
-                fileItem.className = 'flex items-center justify-between bg-gray-50 p-3 rounded-lg';
-                fileItem.innerHTML = `
-                    <div class="flex items-center space-x-3">
-                        <span class="text-primary-600">
-                            <i class="fas fa-file"></i>
-                        </span>
-                        <div>
-                            <div class="font-medium text-gray-800">${file.name}</div>
-                            <div class="text-sm text-gray-500">${formatFileSize(file.size)}</div>
-                        </div>
-                    </div>
-                    <button class="text-red-500 hover:text-red-700" onclick="removeFile('${file.name}', ${file.size})">
-                        <i class="fas fa-times"></i>
-                    </button>
-                `;
-                fileList.appendChild(fileItem);
-            }
-
-            function formatFileSize(bytes) {
-                if (bytes < 1024) return bytes + ' B';
-                else if (bytes < 1024 * 1024) return (bytes / 1024).toFixed(2) + ' KB';
-                else return (bytes / (1024 * 1024)).toFixed(2) + ' MB';
-            }
-
-            function removeFile(name, size) {
-                files = files.filter(f => !(f.name === name && f.size === size));
-                
-                // Rebuild file list
-                fileList.innerHTML = '';
-                files.forEach(addFileToList);
-                
-                updateProcessButton();
-            }
-
-            function updateProcessButton() {
-                processBtn.disabled = files.length === 0;
-                processBtn.innerHTML = files.length > 0 ? 
-                    `<i class="fas fa-bolt mr-2"></i> Generate Snapshot (${files.length} file${files.length > 1 ? 's' : ''})` : 
-                    '<i class="fas fa-bolt mr-2"></i> Generate Snapshot';
-            }
-
-            function showError(message) {
-                errorMessage.textContent = message;
-                errorSection.classList.remove('hidden');
-                setTimeout(() => {
-                    errorSection.classList.add('hidden');
-                }, 5000);
-            }
-
-            function showDeploymentStatus(dropletId) {
-                const statusElement = document.getElementById('deploymentStatus');
-                const dropletIdElement = document.getElementById('currentDropletId');
-                
-                dropletIdElement.textContent = dropletId;
-                statusElement.classList.remove('hidden');
-                
-                // Scroll to status
-                statusElement.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
-            }
-
-            // Function to hide deployment status
-            function hideDeploymentStatus() {
-                const statusElement = document.getElementById('deploymentStatus');
-                statusElement.classList.add('hidden');
-            }
-
-            // Function to update deployment status message
-            function updateDeploymentStatus(message, type = 'info') {
-                const statusElement = document.getElementById('deploymentStatus');
-                const iconElement = statusElement.querySelector('.fa-sync-alt');
-                const messageElement = statusElement.querySelector('.text-blue-800');
-                const detailsElement = statusElement.querySelector('.text-blue-600');
-                
-                if (type === 'success') {
-                    iconElement.className = 'fas fa-check-circle text-green-500';
-                    statusElement.className = 'mt-4 bg-green-50 border border-green-200 rounded-lg p-4';
-                    messageElement.className = 'text-sm font-medium text-green-800';
-                    detailsElement.className = 'text-sm text-green-600';
-                } else if (type === 'error') {
-                    iconElement.className = 'fas fa-exclamation-circle text-red-500';
-                    statusElement.className = 'mt-4 bg-red-50 border border-red-200 rounded-lg p-4';
-                    messageElement.className = 'text-sm font-medium text-red-800';
-                    detailsElement.className = 'text-sm text-red-600';
-                }
-                
-                detailsElement.textContent = message;
-            }
-
-            // Process files
-            processBtn.addEventListener('click', async () => {
-                progressSection.classList.remove('hidden');
-                resultSection.classList.add('hidden');
-                errorSection.classList.add('hidden');
-                processBtn.disabled = true;
-                processBtn.classList.add('processing');
-                
-                const session_id = 'session_' + Date.now();
-                
-                const formData = new FormData();
-                files.forEach(file => formData.append('files', file));
-                formData.append('session_id', session_id);
-                
-                try {
-                    const eventSource = new EventSource(`/process-stream?session_id=${session_id}`);
-                    eventSource.onmessage = function(event) {
-                        const data = JSON.parse(event.data);
-                        updateProgress(data.percent, data.message, data.step);
-                        
-                        if (data.percent === 100) {
-                            eventSource.close();
-                            if (data.snapshot_url) {
-                                snapshotUrl.href = data.snapshot_url;
-                                snapshotUrl.textContent = data.snapshot_url;
-                                resultSection.classList.remove('hidden');
-                                updateConfigCommand(data.snapshot_url);
-                                window.showDeployButton();
-                            }
-                            processBtn.disabled = false;
-                            processBtn.classList.remove('processing');
-                        }
-                    };
-                    
-                    eventSource.onerror = function(error) {
-                        console.error('EventSource failed:', error);
-                        eventSource.close();
-                        showError('Connection error during processing');
-                        processBtn.disabled = false;
-                        processBtn.classList.remove('processing');
-                    };
-                    
-                    const response = await fetch('/process', {
-                        method: 'POST',
-                        body: formData
-                    });
-                    
-                    if (!response.ok) {
-                        const error = await response.text();
-                        throw new Error(error);
-                    }
-                    
-                } catch (error) {
-                    showError('Error processing files: ' + error.message);
-                    processBtn.disabled = false;
-                    processBtn.classList.remove('processing');
-                }
-            });
-
-            function updateProgress(percent, message, step) {
-                progressFill.style.width = percent + '%';
-                progressText.textContent = message;
-                
-                if (step) {
-                    const stepElement = document.createElement('div');
-                    stepElement.innerHTML = `<span class="text-gray-400">${new Date().toLocaleTimeString()}</span>: ${step}`;
-                    document.getElementById('stepDetails').appendChild(stepElement);
-                    document.getElementById('stepDetails').scrollTop = document.getElementById('stepDetails').scrollHeight;
-                }
-            }
-
-            // Function to update the config command with the actual URL
-            function updateConfigCommand(snapshotUrl) {
-                const configCommandElement = document.getElementById('configCommand');
-                configCommandElement.innerHTML = `
-                    gaianet config --snapshot <span class="text-yellow-300">${snapshotUrl}</span><br>
-                    gaianet config --embedding-url <span class="text-yellow-300">https://huggingface.co/gaianet/gte-Qwen2-1.5B-instruct-GGUF/resolve/main/gte-Qwen2-1.5B-instruct-f16.gguf</span><br>
-                    gaianet config embedding-ctx-size <span class="text-yellow-300">8192</span>
-                `;
-            }
-
-            function copySnapshotUrl() {
-                const url = document.getElementById('snapshotUrl').textContent;
-                navigator.clipboard.writeText(url).then(() => {
-                    showToast('Snapshot URL copied to clipboard!');
-                }).catch(err => {
-                    console.error('Failed to copy: ', err);
-                });
-            }
-
-            function copyConfigCommand() {
-                const snapshotUrl = document.getElementById('snapshotUrl').textContent;
-                const configCommand = `gaianet config --snapshot ${snapshotUrl}
-gaianet config --embedding-url https://huggingface.co/gaianet/gte-Qwen2-1.5B-instruct-GGUF/resolve/main/gte-Qwen2-1.5B-instruct-f16.gguf
-gaianet config embedding-ctx-size 8192`;
-
-                navigator.clipboard.writeText(configCommand).then(() => {
-                    showToast('Config commands copied to clipboard!');
-                }).catch(err => {
-                    console.error('Failed to copy: ', err);
-                });
-            }
-
-            function showToast(message) {
-                const toast = document.createElement('div');
-                toast.className = 'fixed bottom-4 right-4 bg-gray-800 text-white px-4 py-2 rounded-lg shadow-lg z-50';
-                toast.textContent = message;
-                document.body.appendChild(toast);
-                
-                setTimeout(() => {
-                    toast.remove();
-                }, 3000);
-            }
-            async function checkDeploymentStatus(dropletId) {
-                try {
-                    const response = await fetch(`/status/${dropletId}`);
-                    const data = await response.json();
-                    
-                    if (data.gaia_url) {
-                        // Deployment completed successfully!
-                        deployButton.disabled = false;
-                        deployButton.innerHTML = '<i class="fas fa-check mr-2"></i> Deployment Complete';
-                        deployButton.classList.remove('bg-blue-600', 'hover:bg-blue-700');
-                        deployButton.classList.add('bg-green-600', 'hover:bg-green-700');
-                        
-                        // Show the Gaia URL
-                        const gaiaUrlElement = document.createElement('div');
-                        gaiaUrlElement.className = 'mt-4 p-4 bg-green-50 border border-green-200 rounded-lg';
-                        gaiaUrlElement.innerHTML = `
-                            <h4 class="font-semibold text-green-800 mb-2">🚀 Your Gaia Node is Ready!</h4>
-                            <p class="text-green-700 mb-2">Open your node and start chatting:</p>
-                            <a href="${data.gaia_url}" target="_blank" class="text-primary-600 hover:text-primary-800 font-medium break-all">
-                                ${data.gaia_url}
-                            </a>
-                            <button onclick="copyGaiaUrl('${data.gaia_url}')" class="ml-2 px-3 py-1 bg-green-600 hover:bg-green-700 text-white rounded text-sm">
-                                <i class="fas fa-copy mr-1"></i> Copy URL
-                            </button>
-                        `;
-                        
-                        // Insert after the deploy button
-                        deployButton.parentNode.insertBefore(gaiaUrlElement, deployButton.nextSibling);
-                        
-                        // Also update the result section with the URL
-                        snapshotUrl.href = data.gaia_url;
-                        snapshotUrl.textContent = data.gaia_url;
-                        
-                        return true;
-                    }
-                    
-                    return false;
-                    
-                } catch (error) {
-                    console.error('Error checking deployment status:', error);
-                    return false;
-                }
-            }
-
-            // Add this function to copy the Gaia URL
-            function copyGaiaUrl(url) {
-                navigator.clipboard.writeText(url).then(() => {
-                    showToast('Gaia URL copied to clipboard!');
-                }).catch(err => {
-                    console.error('Failed to copy: ', err);
-                });
-            }
-
-            window.removeFile = removeFile;
-            window.copySnapshotUrl = copySnapshotUrl;
-            window.copyConfigCommand = copyConfigCommand;
-            window.showDeployButton = showDeployButton;
-        </script>
-    </body>
-    </html>
-    """
-    return HTMLResponse(content=html_content)
+async def verify_huggingface_setup():
+    """Check Hugging Face write access and the target dataset, recording the results"""
+    global hf_access_verified, dataset_verified
+    
+    hf_access_verified, dataset_verified = await asyncio.gather(
+        verify_huggingface_access(),
+        verify_huggingface_dataset()
+    )
+    
+    if not hf_access_verified and HF_TOKEN:
+        logger.warning("Hugging Face token exists but write access could not be verified")
+    
+    if not dataset_verified and HF_DATASET_NAME:
+        logger.warning(f"Target dataset {HF_DATASET_NAME} could not be verified")
 
 @app.get("/deployment-status")
 async def deployment_status(request: Request):
@@ -1139,135 +586,182 @@ async def deployment_status(request: Request):
 @app.get("/check-wasm")
 async def check_wasm():
     """Check if WasmEdge is available"""
-    return {"available": wasmedge_available}
+    # The flag is settled at startup, so let browsers reuse the answer across page loads
+    return ORJSONResponse({"available": wasmedge_available}, headers={"Cache-Control": f"private, max-age={CHECK_WASM_MAX_AGE}"})
+
+class UploadDirectoryTarget(DirectoryTarget):
+    """DirectoryTarget that enforces MAX_FILE_SIZE and writes in UPLOAD_CHUNK_SIZE blocks"""
+
+    def __init__(self, directory_path: Path, max_size: int):
+        super().__init__(str(directory_path))
+        self.max_size = max_size
+        self.part_size = 0
+        self.buffer = bytearray()
+
+    async def on_start_async(self):
+        # DirectoryTarget would otherwise open None (or the directory itself) for a nameless part
+        if not self.multipart_filename or not Path(self.multipart_filename).resolve().name:
+            raise HTTPException(status_code=400, detail="Uploaded file is missing a filename")
+        self.part_size = 0
+        self.buffer.clear()
+        await super().on_start_async()
+
+    async def on_data_received_async(self, chunk: bytes):
+        self.part_size += len(chunk)
+        if self.part_size > self.max_size:
+            raise HTTPException(status_code=413, detail=f"File {self.multipart_filename} exceeds 10MB limit")
+        # Socket reads arrive in small pieces; coalesce them so each threaded write moves a full block
+        self.buffer += chunk
+        if len(self.buffer) >= UPLOAD_CHUNK_SIZE:
+            # The write is awaited before clear(), so the bytearray can go to the file as-is
+            await super().on_data_received_async(self.buffer)
+            self.buffer.clear()
+
+    async def on_finish_async(self):
+        if self.buffer:
+            await super().on_data_received_async(self.buffer)
+            self.buffer.clear()
+        await super().on_finish_async()
+
+async def stream_uploads_to_disk(request: Request):
+    """Stream the multipart body from the socket straight into a session directory"""
+    staging_dir = UPLOAD_DIR / f".incoming-{uuid.uuid4().hex}"
+    staging_dir.mkdir(parents=True, exist_ok=True)
+
+    file_target = UploadDirectoryTarget(staging_dir, MAX_FILE_SIZE)
+    session_target = ValueTarget()
+
+    try:
+        try:
+            parser = StreamingFormDataParser(headers=request.headers)
+        except ParseFailedException as e:
+            raise HTTPException(status_code=400, detail=f"Invalid upload: {e}")
+
+        parser.register("files", file_target)
+        parser.register("session_id", session_target)
+
+        async for chunk in request.stream():
+            await parser.adata_received(chunk)
+
+        if not file_target.multipart_filenames:
+            raise HTTPException(status_code=400, detail="No files uploaded")
+
+        session_id = session_target.value.decode(errors="replace") if session_target.value else str(uuid.uuid4())
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise HTTPException(status_code=400, detail="Invalid session ID")
+        session_dir = UPLOAD_DIR / session_id
+        if session_dir.resolve().parent != UPLOAD_DIR.resolve():
+            raise HTTPException(status_code=400, detail="Invalid session ID")
+        if session_dir.exists():
+            shutil.rmtree(session_dir, ignore_errors=True)
+        staging_dir.rename(session_dir)
+
+        saved_files = [session_dir / name for name in file_target.multipart_filenames]
+        return session_id, session_dir, saved_files
+
+    except Exception as e:
+        # Close the part that was being written when the stream was aborted
+        if file_target._fd is not None and not file_target._fd.closed:
+            await file_target._fd.close()
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        # The client opened its progress stream before posting; end it rather than leave it pinging
+        if session_target.value:
+            session_id = session_target.value.decode(errors="replace")
+            if SESSION_ID_PATTERN.match(session_id):
+                finish_progress(session_id)
+        if isinstance(e, HTTPException):
+            raise
+        if isinstance(e, ParseFailedException):
+            raise HTTPException(status_code=400, detail=f"Invalid upload: {e}")
+        raise
 
 @app.post("/process")
-async def process_files(
-    files: List[UploadFile] = File(...),
-    session_id: str = Form(None)  # Add session_id parameter
-):
+async def process_files(request: Request):
+    # Receive files before entering the pipeline so upload errors keep their status codes
+    session_id, session_dir, saved_files = await stream_uploads_to_disk(request)
+
     try:
-        # Generate session_id if not provided
-        if not session_id:
-            session_id = str(uuid.uuid4())
-        
         # Initialize progress tracking
-        progress_events[session_id] = {"percent": 0, "message": "Starting...", "step": "Initializing"}
+        publish_progress(session_id, {"percent": 0, "message": "Starting...", "step": "Initializing"})
         
         # Check if Qdrant is available
         if qdrant_client is None:
             raise HTTPException(status_code=500, detail="Qdrant database not available")
         
         # Update progress
-        progress_events[session_id] = {"percent": 5, "message": "Saving files...", "step": "Saving uploaded files"}
-        
-        session_dir = UPLOAD_DIR / session_id
-        session_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Save uploaded files
-        saved_files = []
-        for file in files:
-            if file.size > MAX_FILE_SIZE:
-                raise HTTPException(status_code=400, detail=f"File {file.filename} exceeds 10MB limit")
-            
-            file_path = session_dir / file.filename
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
-            saved_files.append(file_path)
-        
-        # Update progress
-        progress_events[session_id] = {"percent": 10, "message": "Processing files...", "step": "Processing file types"}
-        
-        # Process files based on type
-        processed_files = []
-        for file_path in saved_files:
-            ext = file_path.suffix.lower()
-            
-            if ext == '.pdf':
-                progress_events[session_id] = {"percent": 15, "message": "Converting PDF...", "step": f"Converting {file_path.name} to Markdown"}
-                md_path = file_path.with_suffix('.md')
-                await convert_pdf_to_md(file_path, md_path)
-                processed_files.append(('md', md_path))
-            else:
-                processed_files.append((ext[1:], file_path))
+        publish_progress(session_id, {"percent": 5, "message": "Files saved...", "step": f"Saved {len(saved_files)} uploaded files"})
         
         # Update progress
-        progress_events[session_id] = {"percent": 20, "message": "Creating collection...", "step": "Setting up Qdrant collection"}
-        # Always use "default" collection name as required by gaianet
-        global COLLECTION_NAME
-        COLLECTION_NAME = "default"
+        publish_progress(session_id, {"percent": 10, "message": "Creating collection...", "step": "Setting up Qdrant collection"})
+        # Each request loads its own collection so concurrent uploads can't mix points;
+        # Gaia restores the snapshot into "default" by URL, whatever the source collection was called
+        current_collection.set(f"{COLLECTION_NAME}-{uuid.uuid4().hex[:12]}")
 
-        # Create the collection
+        # Create the collection (off the event loop, like the other Qdrant calls in this pipeline)
         try:
-            qdrant_client.create_collection(
-                collection_name=COLLECTION_NAME,
-                vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+            await asyncio.to_thread(
+                qdrant_client.create_collection,
+                collection_name=current_collection.get(),
+                vectors_config=VectorParams(
+                    size=VECTOR_SIZE, distance=Distance.COSINE, datatype=QDRANT_VECTOR_DATATYPE, on_disk=QDRANT_VECTORS_ON_DISK
+                ),
+                quantization_config=SCALAR_QUANTIZATION_CONFIG,
+                # Skip incremental HNSW maintenance while the collection is bulk loaded
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
+                hnsw_config=HnswConfigDiff(m=0),
             )
-            logger.info(f"Created Qdrant collection '{COLLECTION_NAME}' with vector size {VECTOR_SIZE}")
+            logger.info(f"Created Qdrant collection '{current_collection.get()}' with vector size {VECTOR_SIZE}")
         except Exception as e:
             logger.warning(f"Collection may already exist or creation failed: {e}")
             # Continue anyway - the collection might already exist
         # === END OF ADDED SECTION ===
         
-        # Update progress for embedding generation
-        total_embeddings = 0
-        successful_files = 0
-        failed_files = []
-
-        for i, (file_type, file_path) in enumerate(processed_files):
-            progress_percent = 20 + (i * 50 / len(processed_files))
-            progress_events[session_id] = {
-                "percent": progress_percent, 
-                "message": f"Processing {file_path.name}...", 
-                "step": f"Generating embeddings for {file_path.name}"
-            }
-            
-            try:
-                if wasmedge_available:
-                    embeddings_count = await generate_embeddings_wasmedge(file_type, file_path)
-                else:
-                    embeddings_count = await generate_embeddings_fallback(file_type, file_path)
-                total_embeddings += embeddings_count
-                successful_files += 1
-                logger.info(f"Successfully processed {file_path} with {embeddings_count} embeddings")
-            except Exception as e:
-                logger.error(f"Failed to process {file_path}: {e}")
-                failed_files.append(f"{file_path.name}: {str(e)}")
+        # Convert and embed files on a small worker pool so one file's conversion
+        # or WasmEdge run overlaps with the others instead of queueing behind them
+        publish_progress(session_id, {"percent": 20, "message": "Processing files...", "step": f"Processing {len(saved_files)} files"})
+        results = await process_files_concurrently(session_id, saved_files)
+        
+        total_embeddings = sum(count for _, count, error in results if error is None)
+        successful_files = sum(len(names) for names, _, error in results if error is None)
+        failed_files = [f"{name}: {error}" for names, _, error in results if error is not None for name in names]
+        
+        # Build the index once, now that all points are loaded
+        publish_progress(session_id, {"percent": 65, "message": "Building index...", "step": "Building Qdrant HNSW index"})
+        await enable_collection_indexing()
         
         # Update progress
-        progress_events[session_id] = {"percent": 70, "message": "Creating snapshot...", "step": "Creating Qdrant snapshot"}
+        publish_progress(session_id, {"percent": 70, "message": "Creating snapshot...", "step": "Creating Qdrant snapshot"})
         
         # Create snapshot
         snapshot_name = f"snapshot-{session_id}"
         snapshot_file = await create_qdrant_snapshot(snapshot_name)
         
         # Update progress
-        progress_events[session_id] = {"percent": 80, "message": "Compressing...", "step": "Compressing snapshot"}
+        publish_progress(session_id, {"percent": 80, "message": "Compressing...", "step": "Compressing snapshot"})
         
         # Compress snapshot
-        compressed_snapshot = await compress_snapshot(snapshot_file)
+        compressed_snapshot = await compress_snapshot(snapshot_file, session_id)
         
         # Update progress
-        progress_events[session_id] = {"percent": 90, "message": "Uploading to Hugging Face...", "step": "Uploading to Hugging Face"}
+        publish_progress(session_id, {"percent": 90, "message": "Uploading to Hugging Face...", "step": "Uploading to Hugging Face"})
         
         # Upload to Hugging Face
         snapshot_url = await upload_to_huggingface(compressed_snapshot, snapshot_name)
         
         # Update progress
-        progress_events[session_id] = {"percent": 95, "message": "Cleaning up...", "step": "Cleaning up temporary files"}
+        publish_progress(session_id, {"percent": 95, "message": "Cleaning up...", "step": "Cleaning up temporary files"})
         
         # Clean up ALL local files
-        await cleanup_all_files(session_dir, compressed_snapshot, snapshot_file)
+        await cleanup_all_files(session_dir, snapshot_file)
         await cleanup_qdrant_collection()
         
         # Final progress update
-        progress_events[session_id] = {
+        publish_progress(session_id, {
             "percent": 100, 
             "message": "Complete!", 
             "step": "Process completed successfully",
             "snapshot_url": snapshot_url
-        }
+        })
         
         # Prepare response
         response_data = {
@@ -1280,35 +774,160 @@ async def process_files(
         if failed_files:
             response_data["warnings"] = f"{len(failed_files)} files failed: {', '.join(failed_files)}"
 
-        return JSONResponse(response_data)
+        return ORJSONResponse(response_data)
     
     except Exception as e:
         logger.error(f"Error processing files: {e}")
         # Clean up on error too
-        if 'session_dir' in locals():
-            await cleanup_all_files(session_dir, None, None)
+        await cleanup_all_files(session_dir)
         # Also clean up Qdrant collection on error
         await cleanup_qdrant_collection()
         raise HTTPException(status_code=500, detail=str(e))
 
+    finally:
+        # Tell any listening progress stream that no more events are coming
+        finish_progress(session_id)
+
+async def process_single_file(session_id: str, members: List[Path], file_path: Path, percent: float) -> int:
+    """Convert a file if needed and load its embeddings into the collection"""
+    # A merged batch falls back file by file, so points keep the name of the upload they came from
+    sources = members if len(members) > 1 else None
+    file_type = file_path.suffix.lower()[1:]
+    if file_type == 'pdf':
+        publish_progress(session_id, {"percent": percent, "message": "Converting PDF...", "step": f"Converting {file_path.name} to Markdown"})
+        file_path = await convert_pdf_to_md(file_path, file_path.with_suffix('.md'))
+        file_type = 'md'
+    
+    async with embed_slots:
+        if wasmedge_available:
+            return await generate_embeddings_wasmedge(file_type, file_path, sources)
+        return await generate_embeddings_fallback(file_type, file_path)
+
+def batch_small_text_files(saved_files: List[Path]):
+    """Merge small .txt uploads into shared inputs so WasmEdge loads the model once per batch"""
+    items = []
+    batch, batch_size = [], 0
+    
+    def flush():
+        if len(batch) == 1:
+            items.append(([batch[0]], batch[0]))
+        elif batch:
+            # Paragraphs are split on blank lines, so joining with one keeps every file's chunks intact;
+            # a paragraph repeated within one file is written (and embedded) only once.
+            # A fresh O_EXCL name, so the merge can never overwrite an uploaded file
+            with tempfile.NamedTemporaryFile(dir=batch[0].parent, prefix=".batch-", suffix=".txt", delete=False) as out:
+                for path in batch:
+                    seen = set()
+                    for paragraph in path.read_bytes().split(b"\n\n"):
+                        paragraph = paragraph.strip()
+                        if paragraph and paragraph not in seen:
+                            seen.add(paragraph)
+                            out.write(paragraph + b"\n\n")
+            items.append((list(batch), Path(out.name)))
+    
+    for path in saved_files:
+        size = path.stat().st_size
+        if path.suffix.lower() != '.txt' or size >= WASMEDGE_BATCH_BYTES:
+            items.append(([path], path))
+            continue
+        if batch_size + size > WASMEDGE_BATCH_BYTES:
+            flush()
+            batch, batch_size = [], 0
+        batch.append(path)
+        batch_size += size
+    flush()
+    return items
+
+async def process_files_concurrently(session_id: str, saved_files: List[Path]):
+    """Run process_single_file over the uploads with FILE_WORKERS workers fed from a queue"""
+    # Each WasmEdge run pays the GGUF model load, so small text files share a run
+    if wasmedge_available:
+        items = await asyncio.to_thread(batch_small_text_files, saved_files)
+    else:
+        items = [([file_path], file_path) for file_path in saved_files]
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    
+    results = []
+    total = len(saved_files)
+    done = 0
+    
+    async def worker():
+        nonlocal done
+        while True:
+            try:
+                members, file_path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            names = [member.name for member in members]
+            try:
+                count = await process_single_file(session_id, members, file_path, 20 + done * 45 / total)
+                results.append((names, count, None))
+                logger.info(f"Successfully processed {', '.join(names)} with {count} embeddings")
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                logger.error(f"Failed to process {', '.join(names)}: {detail}")
+                results.append((names, 0, detail))
+            
+            # Completed files move the bar across the 20-65% band
+            done += len(members)
+            publish_progress(session_id, {
+                "percent": 20 + done * 45 / total,
+                "message": f"Processed {done}/{total} files...",
+                "step": f"Generated embeddings for {', '.join(names)}"
+            })
+    
+    await asyncio.gather(*(worker() for _ in range(min(FILE_WORKERS, len(items)))))
+    return results
+
+async def enable_collection_indexing(timeout: float = 300):
+    """Re-enable HNSW indexing after a bulk load and wait for the collection to turn green"""
+    try:
+        await asyncio.to_thread(
+            qdrant_client.update_collection,
+            collection_name=current_collection.get(),
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=INDEXING_THRESHOLD),
+            hnsw_config=HnswConfigDiff(m=HNSW_M)
+        )
+        
+        # The snapshot should contain the finished index, not a half-built one
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            collection_info = await asyncio.to_thread(qdrant_client.get_collection, current_collection.get())
+            if collection_info.status == CollectionStatus.GREEN:
+                logger.info(f"Collection '{current_collection.get()}' indexed and ready")
+                return
+            await asyncio.sleep(1)
+        
+        logger.warning(f"Collection '{current_collection.get()}' still indexing after {timeout}s, snapshotting anyway")
+        
+    except Exception as e:
+        logger.warning(f"Could not re-enable indexing for '{current_collection.get()}': {e}")
+
+def convert_pdf_sync(pdf_path: Path, md_path: Path) -> int:
+    """Convert a PDF to Markdown in-process and return the number of characters written"""
+    result = get_markitdown().convert(str(pdf_path))
+    return md_path.write_text(result.text_content, encoding='utf-8')
+
 async def convert_pdf_to_md(pdf_path: Path, md_path: Path):
     """Convert PDF to Markdown using markitdown"""
     try:
-        result = subprocess.run([
-            "markitdown", str(pdf_path), "-o", str(md_path)
-        ], capture_output=True, text=True, check=True)
+        # Parsing is CPU-bound Python, so it runs in the process pool rather than a
+        # thread; no markitdown CLI start-up (interpreter + imports) per PDF
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(cpu_pool, convert_pdf_sync, pdf_path, md_path)
         
-        logger.info(f"PDF to MD conversion: {result.stdout}")
-        if result.stderr:
-            logger.warning(f"PDF to MD conversion warnings: {result.stderr}")
-            
+        logger.info(f"PDF to MD conversion: {pdf_path.name} -> {md_path.name} ({size} chars)")
         return md_path
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error converting PDF to MD: {e.stderr}")
-        raise HTTPException(status_code=500, detail=f"PDF conversion failed: {e.stderr}")
+    except Exception as e:
+        logger.error(f"Error converting PDF to MD: {e}")
+        raise HTTPException(status_code=500, detail=f"PDF conversion failed: {str(e)}")
 
-async def generate_embeddings_wasmedge(file_type: str, file_path: Path) -> int:
-    """Generate embeddings using WasmEdge and the appropriate WASM script"""
+async def generate_embeddings_wasmedge(file_type: str, file_path: Path, sources: List[Path] = None) -> int:
+    """Generate embeddings using WasmEdge; `sources` are the uploads merged into file_path, if any"""
+    sources = sources or [file_path]
     try:
         # Determine the appropriate WASM script and parameters
         if file_type == 'csv':
@@ -1341,7 +960,7 @@ async def generate_embeddings_wasmedge(file_type: str, file_path: Path) -> int:
             "--nn-preload", f"embedding:GGML:AUTO:{model_path.name}",  # Use just filename
             str(wasm_script.absolute()),
             "embedding",  # Model name
-            COLLECTION_NAME,  # Collection name
+            current_collection.get(),  # Collection name
             str(VECTOR_SIZE),  # Vector size
             *args
         ]
@@ -1349,15 +968,34 @@ async def generate_embeddings_wasmedge(file_type: str, file_path: Path) -> int:
         
         logger.info(f"Running WasmEdge command: {' '.join(cmd)}")
         
-        # Run WasmEdge with timeout
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=Path.cwd(), timeout=300)
-        
-        logger.info(f"WasmEdge execution completed: {result.stdout[:200]}...")
-        if result.stderr:
-            logger.warning(f"WasmEdge execution warnings: {result.stderr}")
+        # Run WasmEdge with timeout; awaiting the child keeps the loop free without tying up a thread
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=Path.cwd()
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=300)
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(cmd, 300)
+        finally:
+            # Don't leave the runtime (and its loaded model) behind on timeout or cancellation
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        
+        stdout = stdout.decode(errors='replace')
+        stderr = stderr.decode(errors='replace')
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, output=stdout, stderr=stderr)
+        
+        logger.info(f"WasmEdge execution completed: {stdout[:200]}...")
+        if stderr:
+            logger.warning(f"WasmEdge execution warnings: {stderr}")
         
         # Parse output to get number of embeddings created
-        lines = result.stdout.split('\n')
+        lines = stdout.split('\n')
         for line in lines:
             if "embeddings created" in line.lower() or "vectors created" in line.lower():
                 try:
@@ -1368,7 +1006,7 @@ async def generate_embeddings_wasmedge(file_type: str, file_path: Path) -> int:
                     pass
         
         # If we can't parse the count, estimate based on file size
-        return estimate_embedding_count(file_path, file_type)
+        return await asyncio.to_thread(estimate_embedding_count, file_path, file_type)
             
     except subprocess.TimeoutExpired:
         logger.error("WasmEdge execution timed out after 5 minutes")
@@ -1376,107 +1014,111 @@ async def generate_embeddings_wasmedge(file_type: str, file_path: Path) -> int:
     except subprocess.CalledProcessError as e:
         logger.error(f"Error running WasmEdge: {e.stderr}")
         # Fallback to simple embeddings
-        return await generate_embeddings_fallback(file_type, file_path)
+        return sum([await generate_embeddings_fallback(file_type, path) for path in sources])
     except Exception as e:
         logger.error(f"Unexpected error in embedding generation: {e}")
         # Fallback to simple embeddings
-        return await generate_embeddings_fallback(file_type, file_path)
+        return sum([await generate_embeddings_fallback(file_type, path) for path in sources])
+
+def split_texts(content: str, file_type: str) -> List[str]:
+    """Split file content into paragraphs (txt), level-1 sections (md) or rows (csv)"""
+    if file_type == 'txt':
+        chunks = content.split('\n\n')
+    elif file_type == 'md':
+        chunks = content.split('\n# ')
+    elif file_type == 'csv':
+        chunks = [line for line in content.split('\n') if not line.startswith('#')]
+    else:
+        return []
+    # str.split and str.strip run in C; strip each chunk once and keep the non-empty ones
+    return [chunk for chunk in map(str.strip, chunks) if chunk]
+
+def build_fallback_embeddings(file_path: Path, file_type: str):
+    """Read and split a file, then build the simple fallback vectors and payloads"""
+    # Read in the worker so the content never crosses the process boundary
+    texts = split_texts(file_path.read_text(encoding='utf-8'), file_type)
+    
+    # Repeated boilerplate (headers, notices, duplicate rows) is embedded and stored once
+    texts = list(dict.fromkeys(texts))
+    
+    # Generate simple embeddings: the code points of each text's first VECTOR_SIZE characters,
+    # scaled by 1/255, one row per text (UTF-32 gives the code points as a uint32 buffer)
+    vectors = np.zeros((len(texts), VECTOR_SIZE), dtype=np.float32)
+    for i, text in enumerate(texts):
+        codes = np.frombuffer(text[:VECTOR_SIZE].encode('utf-32-le'), dtype=np.uint32)
+        vectors[i, :len(codes)] = codes
+    vectors /= 255.0
+    
+    # Normalize every row at once
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    
+    upload_tag = uuid.uuid4().hex  # one tag per file rather than a fresh UUID string per point
+    payloads = [
+        {"text": text, "file_type": file_type, "file_name": file_path.name, "session_id": upload_tag}
+        for text in texts
+    ]
+    return vectors, payloads
 
 async def generate_embeddings_fallback(file_type: str, file_path: Path) -> int:
     """Fallback embedding generation using simple method with batching"""
     try:
-        # Read file content
-        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-            content = await f.read()
-        
-        # Extract texts based on file type
-        texts = []
-        if file_type == 'txt':
-            paragraphs = content.split('\n\n')
-            texts = [para.strip() for para in paragraphs if para.strip()]
-        elif file_type == 'md':
-            sections = content.split('\n# ')
-            texts = [section.strip() for section in sections if section.strip()]
-        elif file_type == 'csv':
-            lines = content.split('\n')
-            texts = [line.strip() for line in lines if line.strip() and not line.startswith('#')]
-        
-        # Generate simple embeddings
-        points = []
-        for i, text in enumerate(texts):
-            embedding = [0.0] * VECTOR_SIZE
-            for j, char in enumerate(text[:VECTOR_SIZE]):
-                embedding[j % VECTOR_SIZE] = (embedding[j % VECTOR_SIZE] + ord(char)) / 255.0
-            
-            # Normalize
-            norm = (sum(e**2 for e in embedding)) ** 0.5
-            if norm > 0:
-                embedding = [e / norm for e in embedding]
-            
-            points.append(PointStruct(
-                id=i,
-                vector=embedding,
-                payload={
-                    "text": text,
-                    "file_type": file_type,
-                    "file_name": file_path.name,
-                    "session_id": str(uuid.uuid4())
-                }
-            ))
-        
-        # Store in Qdrant with batching to avoid timeouts
-        if points:
-            batch_size = 100  # Process in smaller batches
-            for i in range(0, len(points), batch_size):
-                batch = points[i:i + batch_size]
-                max_retries = 3
-                for attempt in range(max_retries):
-                    try:
-                        qdrant_client.upsert(
-                            collection_name=COLLECTION_NAME, 
-                            points=batch
-                        )
-                        logger.info(f"Successfully upserted batch {i//batch_size + 1}")
-                        break
-                    except Exception as e:
-                        if attempt < max_retries - 1:
-                            logger.warning(f"Qdrant upsert failed (attempt {attempt + 1}/{max_retries}): {e}")
-                            await asyncio.sleep(2)
-                        else:
-                            logger.error(f"Qdrant upsert failed after {max_retries} attempts: {e}")
-                            # Save this batch to file
-                            await save_embeddings_to_file(batch, file_path, f"_batch_{i//batch_size + 1}")
+        # Reading, chunking and vectorizing are CPU-bound; run them in the process pool
+        # (falls back to the default thread pool when the app was started without lifespan)
+        loop = asyncio.get_running_loop()
+        vectors, payloads = await loop.run_in_executor(cpu_pool, build_fallback_embeddings, file_path, file_type)
+        # Integer ids from a shared counter: compact on the wire and unique across files
+        ids = [next(point_ids) for _ in range(len(vectors))]
+        
+        # Bulk load into Qdrant; the client batches and retries internally. AsyncQdrantClient's
+        # upload_collection runs this same blocking uploader inline, so a worker thread is what keeps the loop free
+        if len(vectors):
+            try:
+                await asyncio.to_thread(
+                    qdrant_client.upload_collection,
+                    collection_name=current_collection.get(),
+                    vectors=vectors,
+                    payload=payloads,
+                    ids=ids,
+                    batch_size=QDRANT_UPLOAD_BATCH_SIZE,
+                    parallel=QDRANT_UPLOAD_PARALLEL if len(vectors) >= QDRANT_PARALLEL_MIN_POINTS else 1,
+                    max_retries=3,
+                    wait=True
+                )
+                logger.info(f"Uploaded {len(vectors)} points in batches of {QDRANT_UPLOAD_BATCH_SIZE}")
+            except Exception as e:
+                logger.error(f"Qdrant bulk upload failed: {e}")
+                # Save the points to file so the embeddings aren't lost
+                await save_embeddings_to_file(vectors, ids, payloads, file_path)
         
-        logger.info(f"Generated {len(points)} fallback embeddings for {file_type} file")
-        return len(points)
+        logger.info(f"Generated {len(vectors)} fallback embeddings for {file_type} file")
+        return len(vectors)
         
     except Exception as e:
         logger.error(f"Error in fallback embedding generation: {e}")
         raise HTTPException(status_code=500, detail=f"Fallback embedding generation failed: {str(e)}")
 
-async def save_embeddings_to_file(points: List[PointStruct], file_path: Path, suffix: str = ""):
+async def save_embeddings_to_file(vectors: np.ndarray, ids: List[int], payloads: List[dict], file_path: Path, suffix: str = ""):
     """Save embeddings to file when Qdrant is unavailable"""
     try:
-        # Create embeddings directory if it doesn't exist
-        EMBEDDING_DIR.mkdir(exist_ok=True)
-        
-        # Create a filename based on the original file
-        embedding_file = EMBEDDING_DIR / f"{file_path.stem}_embeddings{suffix}.json"
-        
-        # Convert points to serializable format
-        embeddings_data = []
-        for point in points:
-            embeddings_data.append({
-                "id": point.id,
-                "vector": point.vector,
-                "payload": point.payload
-            })
+        # One directory per session (uploads live in UPLOAD_DIR/<session_id>), so cleanup only touches this request's files
+        session_embedding_dir = EMBEDDING_DIR / file_path.parent.name
+        session_embedding_dir.mkdir(parents=True, exist_ok=True)
         
-        # Save to file
-        async with aiofiles.open(embedding_file, 'w') as f:
-            await f.write(json.dumps(embeddings_data, indent=2))
+        # Create filenames based on the original file
+        embedding_file = session_embedding_dir / f"{file_path.stem}_embeddings{suffix}.npy"
+        payload_file = embedding_file.with_suffix(".json")
         
-        logger.info(f"Saved {len(points)} embeddings to file: {embedding_file}")
+        # Vectors go in one contiguous matrix (in the collection's datatype) so they can be
+        # reloaded with np.load(..., mmap_mode='r') instead of being parsed into Python lists
+        await asyncio.to_thread(np.save, embedding_file, vectors.astype(VECTOR_DTYPE, copy=False))
+        
+        # Ids and payloads go in a sidecar file, row-aligned with the matrix
+        metadata = [{"id": point_id, "payload": payload} for point_id, payload in zip(ids, payloads)]
+        async with aiofiles.open(payload_file, 'wb') as f:
+            await f.write(orjson.dumps(metadata))
+        
+        logger.info(f"Saved {len(ids)} embeddings to file: {embedding_file}")
         
     except Exception as e:
         logger.error(f"Error saving embeddings to file: {e}")
@@ -1487,18 +1129,8 @@ def estimate_embedding_count(file_path: Path, file_type: str) -> int:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        if file_type == 'txt':
-            # Count paragraphs
-            paragraphs = content.split('\n\n')
-            return len([p for p in paragraphs if p.strip()])
-        elif file_type == 'md':
-            # Count sections (headers)
-            sections = content.split('\n# ')
-            return len([s for s in sections if s.strip()])
-        elif file_type == 'csv':
-            # Count rows
-            lines = content.split('\n')
-            return len([l for l in lines if l.strip() and not l.startswith('#')])
+        if file_type in ('txt', 'md', 'csv'):
+            return len(split_texts(content, file_type))
         else:
             return 1  # Default estimate
     except:
@@ -1508,16 +1140,13 @@ def estimate_embedding_count(file_path: Path, file_type: str) -> int:
 async def create_qdrant_snapshot(snapshot_name: str) -> Path:
     """Create a Qdrant snapshot - ensure it's always a proper snapshot file"""
     try:
-        logger.info(f"Creating snapshot '{snapshot_name}' for collection '{COLLECTION_NAME}'")
+        logger.info(f"Creating snapshot '{snapshot_name}' for collection '{current_collection.get()}'")
 
-        # Always try to create a proper Qdrant snapshot first
-        if QDRANT_API_KEY:  # We're using cloud Qdrant
-            try:
-                return await create_proper_cloud_snapshot(snapshot_name)
-            except Exception as cloud_error:
-                logger.error(f"Cloud snapshot failed, trying direct API: {cloud_error}")
-                return await create_snapshot_via_direct_api(snapshot_name)
-        else:  # Local Qdrant
+        # Let the Qdrant server build the snapshot; the client call works for cloud and local servers
+        try:
+            return await create_proper_cloud_snapshot(snapshot_name)
+        except Exception as client_error:
+            logger.error(f"Client snapshot failed, trying direct API: {client_error}")
             return await create_snapshot_via_direct_api(snapshot_name)
 
     except Exception as e:
@@ -1527,11 +1156,13 @@ async def create_qdrant_snapshot(snapshot_name: str) -> Path:
 async def create_proper_cloud_snapshot(snapshot_name: str) -> Path:
     """Create snapshot using Qdrant client with proper error handling"""
     try:
-        logger.info(f"Creating proper cloud snapshot for '{COLLECTION_NAME}'")
+        logger.info(f"Creating proper cloud snapshot for '{current_collection.get()}'")
         
-        # Create snapshot using Qdrant client
-        snapshot_info = qdrant_client.create_snapshot(
-            collection_name=COLLECTION_NAME
+        # Create snapshot using Qdrant client; wait=True returns once the file is written
+        snapshot_info = await asyncio.to_thread(
+            qdrant_client.create_snapshot,
+            collection_name=current_collection.get(),
+            wait=True
         )
         
         logger.info(f"Snapshot created: {snapshot_info}")
@@ -1540,9 +1171,6 @@ async def create_proper_cloud_snapshot(snapshot_name: str) -> Path:
         actual_snapshot_name = snapshot_info.name
         logger.info(f"Snapshot name: {actual_snapshot_name}")
         
-        # Wait a moment for snapshot to be ready
-        await asyncio.sleep(5)
-        
         # Download using direct API
         return await download_snapshot_via_api(actual_snapshot_name)
         
@@ -1555,68 +1183,37 @@ async def download_snapshot_via_api(snapshot_name: str) -> Path:
     try:
         logger.info(f"Downloading snapshot '{snapshot_name}' using wget approach")
         
-        download_url = f"{QDRANT_URL}/collections/{COLLECTION_NAME}/snapshots/{snapshot_name}"
+        download_url = f"{QDRANT_URL}/collections/{current_collection.get()}/snapshots/{snapshot_name}"
         headers = {}
         if QDRANT_API_KEY:
             headers["api-key"] = QDRANT_API_KEY
         
         logger.info(f"Download URL: {download_url}")
         
-        # Use the exact same approach as wget command in documentation
-        # Wait a bit for the snapshot to be fully ready
-        await asyncio.sleep(10)
-        
         # Try multiple times with proper headers
         max_retries = 3
         for attempt in range(max_retries):
             try:
                 logger.info(f"Download attempt {attempt + 1}/{max_retries}")
+                snapshot_file = SNAPSHOT_DIR / snapshot_name
                 
-                # Use stream=True and proper timeout
-                response = requests.get(
-                    download_url, 
-                    headers=headers, 
-                    stream=True, 
-                    timeout=60,  # Longer timeout for large files
-                    verify=True  # Ensure SSL verification
-                )
-                
-                # Check if we got a successful response
-                if response.status_code == 200:
-                    # Create the snapshot file
-                    snapshot_file = SNAPSHOT_DIR / snapshot_name
-                    
-                    # Download with progress
-                    total_size = int(response.headers.get('content-length', 0))
-                    logger.info(f"Content-length: {total_size} bytes")
-                    
-                    # Download the file
-                    downloaded_size = 0
-                    with open(snapshot_file, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                                downloaded_size += len(chunk)
-                    
-                    # Verify the download
-                    if snapshot_file.exists() and snapshot_file.stat().st_size > 0:
-                        file_size = snapshot_file.stat().st_size
-                        logger.info(f"Successfully downloaded {file_size} bytes")
+                # Stream over the shared async client so the loop keeps serving other requests;
+                # the read timeout applies per chunk, not to the whole (possibly large) transfer
+                async with get_http_client().stream(
+                    "GET", download_url, headers=headers, timeout=httpx.Timeout(60)
+                ) as response:
+                    status_code = response.status_code
+                    if status_code == 200:
+                        total_size = int(response.headers.get('content-length', 0))
+                        logger.info(f"Content-length: {total_size} bytes")
                         
-                        # For cloud snapshots, we expect large files
-                        if file_size > 1024:  # Reasonable minimum
-                            logger.info(f"Snapshot downloaded successfully: {snapshot_file}")
-                            return snapshot_file
-                        else:
-                            logger.warning(f"File too small ({file_size} bytes), might be incomplete")
-                            snapshot_file.unlink()  # Remove the small file
-                            if attempt < max_retries - 1:
-                                await asyncio.sleep(10)
-                                continue
-                    else:
-                        raise Exception("Downloaded file is empty or doesn't exist")
+                        async with aiofiles.open(snapshot_file, 'wb') as f:
+                            async for chunk in response.aiter_bytes(1 << 20):
+                                await f.write(chunk)
+                    elif status_code != 404:
+                        response.raise_for_status()
                 
-                elif response.status_code == 404:
+                if status_code == 404:
                     logger.warning(f"Snapshot not found (404), might need more time to be ready")
                     if attempt < max_retries - 1:
                         await asyncio.sleep(15)
@@ -1624,10 +1221,25 @@ async def download_snapshot_via_api(snapshot_name: str) -> Path:
                     else:
                         raise Exception("Snapshot not found after multiple attempts")
                 
+                # Verify the download
+                if snapshot_file.exists() and snapshot_file.stat().st_size > 0:
+                    file_size = snapshot_file.stat().st_size
+                    logger.info(f"Successfully downloaded {file_size} bytes")
+                    
+                    # For cloud snapshots, we expect large files
+                    if file_size > 1024:  # Reasonable minimum
+                        logger.info(f"Snapshot downloaded successfully: {snapshot_file}")
+                        return snapshot_file
+                    else:
+                        logger.warning(f"File too small ({file_size} bytes), might be incomplete")
+                        snapshot_file.unlink()  # Remove the small file
+                        if attempt < max_retries - 1:
+                            await asyncio.sleep(10)
+                            continue
                 else:
-                    response.raise_for_status()
+                    raise Exception("Downloaded file is empty or doesn't exist")
                     
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                 logger.warning(f"Download attempt {attempt + 1} failed: {e}")
                 if attempt < max_retries - 1:
                     await asyncio.sleep(10)
@@ -1646,7 +1258,7 @@ async def download_snapshot_fallback(snapshot_name: str) -> Path:
     try:
         logger.info(f"Trying fallback download with wget/curl for '{snapshot_name}'")
         
-        download_url = f"{QDRANT_URL}/collections/{COLLECTION_NAME}/snapshots/{snapshot_name}"
+        download_url = f"{QDRANT_URL}/collections/{current_collection.get()}/snapshots/{snapshot_name}"
         snapshot_file = SNAPSHOT_DIR / snapshot_name
         
         # Try wget first (as shown in documentation)
@@ -1697,40 +1309,20 @@ async def download_snapshot_fallback(snapshot_name: str) -> Path:
         logger.error(f"Fallback download also failed: {e}")
         raise
 
-async def is_valid_qdrant_snapshot(snapshot_file: Path) -> bool:
-    """Simple validation - just check file exists and has reasonable size"""
-    try:
-        if not snapshot_file.exists():
-            return False
-            
-        file_size = snapshot_file.stat().st_size
-        # Qdrant snapshots should be at least a few KB
-        return file_size > 1024
-        
-    except Exception:
-        return False
-
-async def is_tar_file(file_path: Path) -> bool:
-    """Check if a file is a valid tar archive"""
-    try:
-        with tarfile.open(file_path, 'r:*') as tar:
-            return True
-    except (tarfile.ReadError, OSError):
-        return False
-
 async def create_snapshot_via_direct_api(snapshot_name: str) -> Path:
     """Create snapshot using direct HTTP API calls"""
     try:
-        logger.info(f"Creating snapshot via direct API for '{COLLECTION_NAME}'")
+        logger.info(f"Creating snapshot via direct API for '{current_collection.get()}'")
         
         # Create snapshot using direct HTTP API
-        create_url = f"{QDRANT_URL}/collections/{COLLECTION_NAME}/snapshots"
+        create_url = f"{QDRANT_URL}/collections/{current_collection.get()}/snapshots"
         headers = {"Content-Type": "application/json"}
         if QDRANT_API_KEY:
             headers["api-key"] = QDRANT_API_KEY
         
         logger.info(f"POST to: {create_url}")
-        response = requests.post(create_url, headers=headers, timeout=30)
+        # wait=true makes Qdrant respond only after the snapshot file is complete
+        response = await get_http_client().post(create_url, headers=headers, params={"wait": "true"}, timeout=300)
         
         # Log the full response for debugging
         logger.info(f"Response status: {response.status_code}")
@@ -1746,11 +1338,6 @@ async def create_snapshot_via_direct_api(snapshot_name: str) -> Path:
         snapshot_size = snapshot_info['result'].get('size', 0)
         logger.info(f"Snapshot created: {actual_snapshot_name}, size: {snapshot_size} bytes")
         
-        # Wait longer for large snapshots
-        wait_time = max(15, min(snapshot_size // 1000000, 60))  # 1 second per MB, max 60s
-        logger.info(f"Waiting {wait_time}s for snapshot to be ready...")
-        await asyncio.sleep(wait_time)
-        
         # Download the snapshot
         return await download_snapshot_via_api(actual_snapshot_name)
         
@@ -1761,257 +1348,53 @@ async def create_snapshot_via_direct_api(snapshot_name: str) -> Path:
             logger.error(f"Error response: {e.response.text}")
         raise
 
-async def create_manual_snapshot(snapshot_name: str) -> Path:
-    """Create a manual snapshot that Qdrant can actually import"""
-    try:
-        logger.info(f"Creating manual snapshot for collection '{COLLECTION_NAME}'")
-        
-        # Get collection info to understand the structure
-        try:
-            collection_info = qdrant_client.get_collection(COLLECTION_NAME)
-            logger.info(f"Collection info: {collection_info}")
-        except Exception as e:
-            logger.warning(f"Could not get collection info: {e}")
-        
-        # Get all points with pagination
-        all_points = []
-        next_offset = None
-        batch_count = 0
-        
-        while True:
+def build_snapshot_archive(snapshot_file: Path, compressed_file: Path):
+    """Write and verify the tar.gz; CPU-bound, so callers run it in a worker thread"""
+    # Add the raw snapshot directly under the name GaiaNet expects (no intermediate copy)
+    # Use GNU_FORMAT to maximize compatibility
+    if PIGZ_PATH:
+        # Stream the tar into pigz so compression uses every core instead of one
+        with open(compressed_file, 'wb') as fout:
+            proc = subprocess.Popen([PIGZ_PATH, f"-{SNAPSHOT_GZIP_LEVEL}", "-c"], stdin=subprocess.PIPE, stdout=fout)
             try:
-                points, next_offset = qdrant_client.scroll(
-                    collection_name=COLLECTION_NAME,
-                    limit=1000,
-                    offset=next_offset,
-                    with_payload=True,
-                    with_vectors=True
-                )
-                
-                if points:
-                    all_points.extend(points)
-                    batch_count += 1
-                    logger.info(f"Retrieved batch {batch_count}: {len(points)} points")
-                
-                if not next_offset or not points:
-                    break
-                    
-            except Exception as e:
-                logger.error(f"Error retrieving points: {e}")
-                break
-        
-        logger.info(f"Total points retrieved: {len(all_points)}")
-        
-        # Create a snapshot file in a format that Qdrant can import
-        # For manual snapshots, we'll create a JSON file that can be processed
-        snapshot_file = SNAPSHOT_DIR / f"{snapshot_name}.json"
-        
-        snapshot_data = {
-            "collection_name": COLLECTION_NAME,
-            "vectors_config": {
-                "size": VECTOR_SIZE,
-                "distance": "Cosine"
-            },
-            "points": [
-                {
-                    "id": point.id,
-                    "vector": point.vector,
-                    "payload": point.payload
-                }
-                for point in all_points
-            ],
-            "total_points": len(all_points),
-            "created_at": datetime.now().isoformat()
-        }
-        
-        async with aiofiles.open(snapshot_file, 'w') as f:
-            await f.write(json.dumps(snapshot_data, indent=2, default=str))
-        
-        logger.info(f"Created manual snapshot: {snapshot_file}")
-        return snapshot_file
-        
-    except Exception as e:
-        logger.error(f"Error creating manual snapshot: {e}")
-        raise HTTPException(status_code=500, detail=f"Manual snapshot creation failed: {str(e)}")
-
-async def create_memory_snapshot(snapshot_name: str) -> Path:
-    """Create a snapshot for in-memory Qdrant"""
-    try:
-        # Get all points from the collection
-        points, offset = qdrant_client.scroll(
-            collection_name=COLLECTION_NAME,
-            limit=10000,  # Reasonable limit
-            with_payload=True,
-            with_vectors=True
-        )
-        
-        # Create snapshot data
-        snapshot_data = {
-            "collection": COLLECTION_NAME,
-            "vectors_count": len(points),
-            "points_count": len(points),
-            "points": [
-                {
-                    "id": point.id,
-                    "vector": point.vector,
-                    "payload": point.payload
-                }
-                for point in points
-            ],
-            "created_at": str(datetime.now()),
-        }
-        
-        # Save snapshot
-        snapshot_file = SNAPSHOT_DIR / f"{snapshot_name}.snapshot"
-        async with aiofiles.open(snapshot_file, 'w') as f:
-            await f.write(json.dumps(snapshot_data, indent=2, default=str))
-        
-        logger.info(f"Created memory snapshot: {snapshot_file}")
-        return snapshot_file
-        
-    except Exception as e:
-        logger.error(f"Error creating memory snapshot: {e}")
-        raise HTTPException(status_code=500, detail=f"Memory snapshot creation failed: {str(e)}")
-
-async def create_cloud_snapshot(snapshot_name: str) -> Path:
-    """Create and download snapshot from Qdrant Cloud using the correct API approach"""
-    try:
-        logger.info(f"Creating cloud snapshot for collection '{COLLECTION_NAME}'")
-        
-        # Step 1: Create snapshot using Qdrant client (as per documentation)
-        snapshot_info = qdrant_client.create_snapshot(
-            collection_name=COLLECTION_NAME,
-            snapshot_name=snapshot_name
-        )
-        
-        logger.info(f"Snapshot creation response: {snapshot_info}")
-        
-        # Extract the actual snapshot name from the response
-        actual_snapshot_name = snapshot_info.name
-        logger.info(f"Snapshot created with name: {actual_snapshot_name}")
-        
-        # Step 2: Wait a moment for the snapshot to be fully created
-        await asyncio.sleep(3)
-        
-        # Step 3: Download the snapshot using direct HTTP API (as per documentation)
-        snapshot_url = f"{QDRANT_URL}/collections/{COLLECTION_NAME}/snapshots/{actual_snapshot_name}"
-        logger.info(f"Downloading snapshot from: {snapshot_url}")
-        
-        # Create headers with API key
-        headers = {}
-        if QDRANT_API_KEY:
-            headers["api-key"] = QDRANT_API_KEY
-        
-        # Download the snapshot
-        response = requests.get(snapshot_url, headers=headers, stream=True)
-        response.raise_for_status()
-        
-        # Create the snapshot file with the exact name from Qdrant
-        snapshot_file = SNAPSHOT_DIR / actual_snapshot_name
-        
-        # Download with progress
-        total_size = int(response.headers.get('content-length', 0))
-        logger.info(f"Downloading {total_size} bytes to {snapshot_file}")
-        
-        with open(snapshot_file, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-        
-        # Verify download
-        if snapshot_file.exists() and snapshot_file.stat().st_size > 0:
-            file_size = snapshot_file.stat().st_size
-            logger.info(f"Successfully downloaded snapshot: {snapshot_file} ({file_size} bytes)")
-            
-            # The downloaded file should be a valid Qdrant snapshot
-            # Don't modify it - Qdrant expects this exact format
-            return snapshot_file
-        else:
-            raise Exception("Downloaded snapshot file is empty or doesn't exist")
-            
-    except Exception as e:
-        logger.error(f"Error creating cloud snapshot: {e}")
-        # Fallback to manual approach if cloud API fails
-        logger.warning("Falling back to manual snapshot creation")
-        return await create_manual_snapshot(snapshot_name)
-
-def _is_gzip_bytes(prefix: bytes) -> bool:
-    return len(prefix) >= 2 and prefix[0] == 0x1F and prefix[1] == 0x8B
-
-def verify_public_download_sync(url: str, timeout: int = 30) -> bool:
-    """
-    Synchronously download `url` (no auth) and verify:
-      - HTTP 200
-      - starts with gzip magic
-      - opens as a tar.gz and contains exactly `default.snapshot`
-    This simulates what Gaia's `curl` + `tar -xzOf` will see.
-    """
-    try:
-        resp = requests.get(url, timeout=timeout, allow_redirects=True)
-        if resp.status_code != 200:
-            logger.warning(f"Public GET {url} returned status {resp.status_code}")
-            return False
-
-        # Quick size check
-        if len(resp.content) < 1024:
-            logger.warning(f"Public GET {url} returned very small file ({len(resp.content)} bytes)")
-            return False
-
-        # Check gzip magic bytes
-        if not _is_gzip_bytes(resp.content[:2]):
-            logger.warning("Downloaded content is not gzip (magic mismatch)")
-            return False
-
-        # Try to open as tar.gz and validate contents
-        bio = io.BytesIO(resp.content)
-        try:
-            with tarfile.open(fileobj=bio, mode="r:gz") as tar:
-                names = tar.getnames()
-                # Gaia expects one top-level member named 'default.snapshot'
-                if names != ["default.snapshot"]:
-                    logger.warning(f"Downloaded tar does not contain default.snapshot: {names}")
-                    return False
-        except Exception as e:
-            logger.warning(f"Failed to read downloaded file as tar.gz: {e}")
-            return False
-
-        return True
-    except Exception as e:
-        logger.warning(f"verify_public_download_sync error: {e}")
-        return False
-
-async def compress_snapshot(snapshot_file: Path) -> Path:
+                with tarfile.open(fileobj=proc.stdin, mode="w|", format=tarfile.GNU_FORMAT) as tar:
+                    tar.add(snapshot_file, arcname="default.snapshot")
+            finally:
+                proc.stdin.close()
+                returncode = proc.wait()
+        if returncode != 0:
+            raise Exception(f"pigz exited with status {returncode}")
+    else:
+        with tarfile.open(compressed_file, "w:gz", format=tarfile.GNU_FORMAT,
+                          compresslevel=SNAPSHOT_GZIP_LEVEL) as tar:
+            tar.add(snapshot_file, arcname="default.snapshot")
+
+    # Verification: open it back and check it contains exactly default.snapshot and is non-empty
+    with tarfile.open(compressed_file, "r:gz") as tar:
+        names = tar.getnames()
+        if names != ["default.snapshot"]:
+            raise Exception(f"Archive contents invalid: {names}")
+        f = tar.extractfile("default.snapshot")
+        if f is None or f.read(1) == b"":
+            raise Exception("default.snapshot inside tar.gz is empty")
+
+async def compress_snapshot(snapshot_file: Path, session_id: str) -> Path:
     """
     Create a GaiaNet-compatible tar.gz containing exactly one entry named 'default.snapshot'.
-    Returns the path to SNAPSHOT_DIR/default.snapshot.tar.gz
+    Returns the path to SNAPSHOT_DIR/<session_id>/default.snapshot.tar.gz
     """
     try:
         if not snapshot_file.exists() or snapshot_file.stat().st_size == 0:
             raise Exception("Snapshot file is empty or doesn't exist")
 
-        # Use a deterministic output name so downstream URLs are predictable
-        compressed_file = SNAPSHOT_DIR / "default.snapshot.tar.gz"
-        temp_snapshot = SNAPSHOT_DIR / "default.snapshot"
+        # Use a deterministic output name so downstream URLs are predictable; the per-session
+        # directory keeps overlapping requests from overwriting each other's archive
+        compressed_file = SNAPSHOT_DIR / session_id / "default.snapshot.tar.gz"
 
-        # Make sure snapshots dir exists
-        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        # Make sure the session's snapshots dir exists
+        compressed_file.parent.mkdir(parents=True, exist_ok=True)
 
-        # Copy the raw snapshot to default.snapshot (preserve metadata)
-        shutil.copy2(snapshot_file, temp_snapshot)
-
-        # Create the tar.gz containing exactly default.snapshot
-        # Use GNU_FORMAT to maximize compatibility
-        with tarfile.open(compressed_file, "w:gz", format=tarfile.GNU_FORMAT) as tar:
-            tar.add(temp_snapshot, arcname="default.snapshot")
-
-        # Verification: open it back and check it contains exactly default.snapshot and is non-empty
-        with tarfile.open(compressed_file, "r:gz") as tar:
-            names = tar.getnames()
-            if names != ["default.snapshot"]:
-                raise Exception(f"Archive contents invalid: {names}")
-            f = tar.extractfile("default.snapshot")
-            if f is None or f.read(1) == b"":
-                raise Exception("default.snapshot inside tar.gz is empty")
+        await asyncio.to_thread(build_snapshot_archive, snapshot_file, compressed_file)
 
         logger.info(f"Successfully created GaiaNet-compatible tar.gz: {compressed_file}")
         return compressed_file
@@ -2020,6 +1403,38 @@ async def compress_snapshot(snapshot_file: Path) -> Path:
         logger.error(f"Error creating CLI-compatible archive: {e}")
         raise
 
+async def commit_to_hub(repo_id: str, operations: List[CommitOperationAdd], commit_message: str):
+    """Upload every addition, then land them all in a single dataset commit"""
+    api = get_hf_api()
+    
+    # Large files go through the Xet backend (chunked, parallel, deduplicated);
+    # run the blocking transfers in a worker thread so other requests keep being served.
+    # Content is sent separately from the commit so a dropped connection only retries
+    # the upload; chunks the Hub already holds are skipped on the next attempt
+    for attempt in range(1, HF_UPLOAD_RETRIES + 1):
+        try:
+            await asyncio.to_thread(
+                api.preupload_lfs_files,
+                repo_id=repo_id,
+                additions=operations,
+                repo_type="dataset",
+            )
+            break
+        except Exception as e:
+            if attempt == HF_UPLOAD_RETRIES:
+                raise
+            logger.warning(f"Upload attempt {attempt} failed, retrying: {e}")
+            await asyncio.sleep(2 ** attempt)
+    
+    # One commit (one auth + repo lock, one notification) however many files there are
+    await asyncio.to_thread(
+        api.create_commit,
+        repo_id=repo_id,
+        repo_type="dataset",
+        operations=operations,
+        commit_message=commit_message,
+    )
+
 async def upload_to_huggingface(compressed_snapshot: Path, snapshot_name: str) -> str:
     """
     Uploads compressed_snapshot to the fixed dataset `thenocode/gaia-console`.
@@ -2030,23 +1445,22 @@ async def upload_to_huggingface(compressed_snapshot: Path, snapshot_name: str) -
         if not HF_TOKEN:
             return f"File: {compressed_snapshot} (upload manually - no HF_TOKEN)"
 
-        api = HfApi(token=HF_TOKEN)
-
         # Always use this dataset
         repo_id = "thenocode/gaia-console"
         snapshot_filename = compressed_snapshot.name
 
-        # Create timestamped folder inside snapshots/
+        # Create timestamped folder inside snapshots/; the collection's random suffix keeps
+        # two requests finishing in the same second from committing to the same path
         ts = datetime.now(timezone.utc).strftime("%Y-%m-%d-%H-%M-%S")
-        path_in_repo = f"snapshots/{ts}/{snapshot_filename}"
+        run_id = current_collection.get().removeprefix(f"{COLLECTION_NAME}-")
+        path_in_repo = f"snapshots/{ts}-{run_id}/{snapshot_filename}"
 
         logger.info(f"Uploading {compressed_snapshot} to {repo_id}:{path_in_repo}")
 
-        api.upload_file(
-            path_or_fileobj=str(compressed_snapshot),
-            path_in_repo=path_in_repo,
-            repo_id=repo_id,
-            repo_type="dataset",
+        await commit_to_hub(
+            repo_id,
+            [CommitOperationAdd(path_in_repo=path_in_repo, path_or_fileobj=str(compressed_snapshot))],
+            f"Upload {path_in_repo} with huggingface_hub",
         )
 
         # Public URL Gaia can curl
@@ -2059,188 +1473,50 @@ async def upload_to_huggingface(compressed_snapshot: Path, snapshot_name: str) -
         logger.error(f"Upload failed: {e}")
         return f"File: {compressed_snapshot} (upload failed: {str(e)})"
           
-async def verify_tar_file(tar_file: Path) -> bool:
-    """Verify the tar.gz file is valid using system tar command"""
-    try:
-        cmd = ["tar", "tzvf", str(tar_file)]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            logger.info(f"Tar file contents: {result.stdout.strip()}")
-            return True
-        else:
-            logger.warning(f"Tar verification failed: {result.stderr}")
-            return False
-    except Exception as e:
-        logger.warning(f"Tar verification error: {e}")
-        return False
-
-async def compress_with_python_fallback(snapshot_file: Path) -> Path:
-    """Fallback compression using Python tarfile with specific format"""
-    try:
-        logger.warning("Using Python tarfile fallback compression")
-        
-        compressed_file = SNAPSHOT_DIR / f"{snapshot_file.name}.tar.gz"
-        
-        # Use specific format options to match GNU tar
-        with tarfile.open(compressed_file, "w:gz", format=tarfile.GNU_FORMAT) as tar:
-            # Add file with preserve permissions
-            tar.add(snapshot_file, arcname=snapshot_file.name, recursive=False)
-        
-        logger.info(f"Python fallback compression: {compressed_file}")
-        return compressed_file
-        
-    except Exception as e:
-        logger.error(f"Python fallback compression also failed: {e}")
-        # If all else fails, return the original uncompressed file
-        return snapshot_file
-
-async def upload_without_snapshots_folder(compressed_snapshot: Path, snapshot_name: str) -> str:
-    """Fallback upload without the snapshots folder"""
-    try:
-        api = HfApi(token=HF_TOKEN)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        snapshot_filename = f"snapshot_{timestamp}.tar.gz"
-        
-        # Try uploading to root instead of snapshots folder
-        api.upload_file(
-            path_or_fileobj=str(compressed_snapshot),
-            path_in_repo=snapshot_filename,
-            repo_id=HF_DATASET_NAME,
-            repo_type="dataset",
-        )
-        
-        return f"https://huggingface.co/datasets/{HF_DATASET_NAME}/resolve/main/{snapshot_filename}"
-        
-    except Exception as e:
-        raise Exception(f"Root upload failed: {str(e)}")
-
-async def upload_with_force(compressed_snapshot: Path, snapshot_name: str) -> str:
-    """Alternative upload method for existing repositories"""
-    try:
-        api = HfApi(token=HF_TOKEN)
-        
-        # Try to upload to the original repository with different approach
-        api.upload_file(
-            path_or_fileobj=str(compressed_snapshot),
-            path_in_repo=f"snapshots/{snapshot_name}.tar.gz",
-            repo_id=HF_DATASET_NAME,
-            repo_type="dataset",
-            # Add additional parameters that might help
-        )
-        
-        return f"https://huggingface.co/datasets/{HF_DATASET_NAME}/raw/main/snapshots/{snapshot_name}.tar.gz"
-        
-    except Exception as e:
-        # If that fails, try the folder approach
-        return await upload_as_folder(compressed_snapshot, snapshot_name)
-
-async def upload_as_folder(compressed_snapshot: Path, snapshot_name: str) -> str:
-    """Upload using the folder method which might have different permissions"""
-    try:
-        api = HfApi(token=HF_TOKEN)
-        
-        # Create temporary directory structure
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            # Create a folder for the upload
-            upload_folder = temp_path / "snapshot_upload"
-            upload_folder.mkdir()
-            
-            # Copy the snapshot
-            shutil.copy2(compressed_snapshot, upload_folder / "snapshot.tar.gz")
-            
-            # Upload the entire folder
-            api.upload_folder(
-                folder_path=str(upload_folder),
-                repo_id=HF_DATASET_NAME,
-                repo_type="dataset",
-                path_in_repo=f"snapshots/{snapshot_name}",
+async def remove_tree(path: Path):
+    """Delete a directory tree with native `rm -rf`, falling back to shutil.rmtree"""
+    if os.name == "posix":
+        try:
+            # One native walk instead of a Python-level syscall per entry
+            proc = await asyncio.create_subprocess_exec(
+                "rm", "-rf", "--", str(path),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
             )
-        
-        return f"https://huggingface.co/datasets/{HF_DATASET_NAME}/tree/main/snapshots/{snapshot_name}"
-        
-    except Exception as e:
-        raise Exception(f"Folder upload failed: {str(e)}")
+            if await proc.wait() == 0:
+                return
+        except FileNotFoundError:
+            pass
+    await asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
 
-async def upload_to_huggingface_alternative(compressed_snapshot: Path, snapshot_name: str) -> str:
-    """Alternative upload method using different API approach"""
-    try:
-        # Use a different method - upload folder instead of single file
-        api = HfApi(token=HF_TOKEN)
-        
-        # Create a temporary directory structure
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            # Create snapshot directory
-            snapshot_dir = temp_path / "snapshot"
-            snapshot_dir.mkdir()
-            
-            # Copy our compressed snapshot
-            shutil.copy2(compressed_snapshot, snapshot_dir / "snapshot.tar.gz")
-            
-            # Create a README for the dataset
-            readme_content = f"""
-            # Snapshot Dataset: {snapshot_name}
-            
-            This is an automatically generated snapshot from the Document Snapshot Generator.
-            
-            Created: {datetime.now().isoformat()}
-            """
-            
-            with open(snapshot_dir / "README.md", "w") as f:
-                f.write(readme_content)
-            
-            # Upload the entire folder
-            api.upload_folder(
-                folder_path=str(snapshot_dir),
-                repo_id="thenocode/gaia-console",
-                repo_type="dataset",
-            )
-            
-            logger.info(f"Successfully uploaded via alternative method")
-            return f"https://huggingface.co/datasets/{snapshot_name}"
-            
-    except Exception as e:
-        logger.error(f"Alternative upload method also failed: {e}")
-        # As a last resort, provide instructions for manual upload
-        return f"https://huggingface.co/datasets/{snapshot_name} (manual upload required - file: {compressed_snapshot})"
+def unlink_quietly(path: Path):
+    """Delete a file if there is one; a missing file (or no path at all) is not an error"""
+    if path is None:
+        return
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+        logger.info(f"Cleaned up {path}")
 
-async def cleanup_all_files(session_dir: Path, compressed_snapshot: Path = None, snapshot_file: Path = None):
+async def cleanup_all_files(session_dir: Path, snapshot_file: Path = None):
     """Clean up all temporary files after successful upload"""
     try:
-        # Clean up session directory (uploaded files)
+        # Clean up session directory (uploaded files): renaming it aside is instant,
+        # the actual delete runs in a worker thread after the response has gone out
         if session_dir and session_dir.exists():
-            shutil.rmtree(session_dir, ignore_errors=True)
+            doomed_dir = UPLOAD_DIR / f".deleting-{uuid.uuid4().hex}"
+            os.replace(session_dir, doomed_dir)
+            task = asyncio.create_task(remove_tree(doomed_dir))
+            cleanup_tasks.add(task)
+            task.add_done_callback(cleanup_tasks.discard)
             logger.info(f"Cleaned up session directory: {session_dir}")
         
-        # Clean up compressed snapshot
-        if compressed_snapshot and compressed_snapshot.exists():
-            try:
-                compressed_snapshot.unlink()
-                logger.info(f"Cleaned up compressed snapshot: {compressed_snapshot}")
-            except:
-                pass
-        
-        # Clean up uncompressed snapshot
-        if snapshot_file and snapshot_file.exists():
-            try:
-                snapshot_file.unlink()
-                logger.info(f"Cleaned up snapshot file: {snapshot_file}")
-            except:
-                pass
-        
-        # Clean up any embedding files that might have been created
-        try:
-            embedding_files = list(EMBEDDING_DIR.glob("*.json"))
-            for embedding_file in embedding_files:
-                if embedding_file.exists():
-                    embedding_file.unlink()
-                    logger.info(f"Cleaned up embedding file: {embedding_file}")
-        except:
-            pass
+        # Clean up this request's snapshot, archive directory and saved embeddings side by side;
+        # other sessions' files in the shared directories are left alone
+        await asyncio.gather(
+            asyncio.to_thread(unlink_quietly, snapshot_file),
+            remove_tree(SNAPSHOT_DIR / session_dir.name),
+            remove_tree(EMBEDDING_DIR / session_dir.name),
+        )
         
         logger.info("All temporary files cleaned up successfully")
         
@@ -2251,16 +1527,15 @@ async def cleanup_all_files(session_dir: Path, compressed_snapshot: Path = None,
 async def cleanup_qdrant_collection():
     """Clean up the Qdrant collection after successful processing"""
     try:
-        if qdrant_client and COLLECTION_NAME != "default":
-            # Only delete if it's not the default collection and we're not using cloud Qdrant
-            if not QDRANT_API_KEY:  # Only cleanup if not using cloud (for cost reasons)
-                try:
-                    qdrant_client.delete_collection(COLLECTION_NAME)
-                    logger.info(f"Deleted Qdrant collection '{COLLECTION_NAME}'")
-                except Exception as e:
-                    logger.warning(f"Could not delete collection '{COLLECTION_NAME}': {e}")
-            else:
-                logger.info(f"Keeping collection '{COLLECTION_NAME}' on cloud Qdrant")
+        collection_name = current_collection.get()
+        if qdrant_client and collection_name != COLLECTION_NAME:
+            # Per-request collections are scratch space once the snapshot is taken,
+            # on cloud Qdrant too, where leaving them behind would keep billing storage
+            try:
+                await asyncio.to_thread(qdrant_client.delete_collection, collection_name)
+                logger.info(f"Deleted Qdrant collection '{collection_name}'")
+            except Exception as e:
+                logger.warning(f"Could not delete collection '{collection_name}': {e}")
     except Exception as e:
         logger.warning(f"Error during Qdrant collection cleanup: {e}")
 
@@ -2277,7 +1552,8 @@ async def check_deployment(droplet_id: int):
         return {"status": "pending", "message": "Droplet IP not available yet"}
     
     try:
-        gaia_url = fetch_gaia_url(ip)
+        # SSH is blocking, so it runs in a worker thread
+        gaia_url = await asyncio.to_thread(fetch_gaia_url, ip)
         if gaia_url:
             deployment["gaia_url"] = gaia_url
             return {
@@ -2296,48 +1572,99 @@ async def check_deployment(droplet_id: int):
             "message": f"Error checking deployment: {str(e)}"
         }
 
+def get_progress_queue(session_id: str) -> asyncio.Queue:
+    """Return the progress queue for a session, creating it for whichever side arrives first"""
+    if session_id not in progress_events:
+        progress_events[session_id] = asyncio.Queue(maxsize=128)
+    return progress_events[session_id]
+
+def publish_progress(session_id: str, event: dict):
+    """Push a progress event to the session's SSE listener"""
+    # A new run under a reused session id is no longer finished
+    finished_progress.pop(session_id, None)
+    queue = get_progress_queue(session_id)
+    if queue.full():
+        # Nobody is draining the stream; keep the newest events
+        queue.get_nowait()
+    # Encode once here; the stream only joins the ready-made payloads into a frame
+    payload = orjson.dumps(event)
+    last_progress[session_id] = payload
+    queue.put_nowait(payload)
+
+def finish_progress(session_id: str):
+    """Close the session's progress stream and release the queue"""
+    # Forget sessions that finished more than FINISHED_PROGRESS_TTL ago
+    now = time.monotonic()
+    for expired in [sid for sid, (finished_at, _) in finished_progress.items() if now - finished_at >= FINISHED_PROGRESS_TTL]:
+        del finished_progress[expired]
+    finished_progress.pop(session_id, None)
+    finished_progress[session_id] = (now, last_progress.pop(session_id, None))
+    
+    queue = progress_events.pop(session_id, None)
+    if queue is not None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
 @app.get("/process-stream")
 async def process_stream(request: Request):
     """Server-sent events endpoint for progress updates"""
     session_id = request.query_params.get("session_id")
     
     async def event_generator():
+        # Frames are written as ready-made SSE bytes; payloads were already encoded by publish_progress
         if not session_id:
-            yield {"event": "error", "data": "No session ID provided"}
+            yield b"event: error\ndata: No session ID provided\n\n"
+            return
+        
+        # The run already ended before this stream connected; replay its last event and stop
+        if session_id in finished_progress:
+            _, last_event = finished_progress[session_id]
+            if last_event is not None:
+                yield b"event: message\ndata: [" + last_event + b"]\n\n"
             return
             
         # Send initial connection message
-        yield {
-            "event": "message",
-            "data": json.dumps({
-                "percent": 0,
-                "message": "Starting processing...",
-                "step": "Initializing"
-            })
-        }
+        yield SSE_INITIAL_FRAME
         
-        # Wait for progress updates
-        last_percent = 0
-        while True:
-            if session_id in progress_events:
-                event = progress_events[session_id]
-                if event.get("percent", 0) > last_percent:
-                    yield {
-                        "event": "message",
-                        "data": json.dumps(event)
-                    }
-                    last_percent = event.get("percent", 0)
-                    
-                    if last_percent >= 100:
+        # Wait for progress updates; the producer wakes us up, None marks the end
+        queue = get_progress_queue(session_id)
+        loop = asyncio.get_running_loop()
+        finished = False
+        getter = None
+        try:
+            while not finished:
+                # Keep one pending get across pings so a timeout never drops a dequeued event
+                if getter is None:
+                    getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait((getter,), timeout=SSE_PING_INTERVAL)
+                if not done:
+                    yield SSE_PING_FRAME
+                    continue
+                event = getter.result()
+                getter = None
+                if event is None:
+                    break
+                
+                # Fold whatever else is already queued into the same frame (one write/flush per batch)
+                payloads = [event]
+                deadline = loop.time() + SSE_BATCH_WINDOW
+                while loop.time() < deadline and not queue.empty():
+                    event = queue.get_nowait()
+                    if event is None:
+                        finished = True
                         break
-            
-            await asyncio.sleep(0.5)
-            
-            # Check if client is still connected
-            if await request.is_disconnected():
-                break
+                    payloads.append(event)
+                
+                yield b"event: message\ndata: [" + b",".join(payloads) + b"]\n\n"
+        finally:
+            if getter is not None:
+                getter.cancel()
+            # Client went away before the run finished; don't leave the queue behind
+            if progress_events.get(session_id) is queue:
+                del progress_events[session_id]
     
-    return EventSourceResponse(event_generator())
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 # -------------------------
 # DigitalOcean Integration & Streaming
@@ -2398,12 +1725,31 @@ def get_installation_progress(ip: str) -> str:
     except Exception as e:
         return f"ERROR: {e}"
 
+def fetch_installation_log(ip: str):
+    """Return the droplet's full installation log and any stderr output"""
+    if SSH_PASSPHRASE:
+        key = paramiko.RSAKey.from_private_key_file(SSH_PRIVATE_KEY, password=SSH_PASSPHRASE)
+    else:
+        key = paramiko.RSAKey.from_private_key_file(SSH_PRIVATE_KEY)
+
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(ip, username=SSH_USER, pkey=key, timeout=15)
+
+    # Get the full installation log
+    stdin, stdout, stderr = ssh.exec_command("cat /var/log/gaianet-detailed-install.log")
+    full_log = stdout.read().decode().strip()
+    error_log = stderr.read().decode().strip()
+    
+    ssh.close()
+    return full_log, error_log
+
 def push_log(droplet_id: int, message: str):
     q = LOG_STREAMS.get(droplet_id)
-    payload = json.dumps({
+    payload = orjson.dumps({
         "ts": int(time.time()),
         "message": message
-    })
+    }).decode()
     if q:
         try:
             q.put_nowait(payload)
@@ -2416,7 +1762,7 @@ def append_log(droplet_id: int, message: str):
     LOGS.setdefault(droplet_id, []).append(message)
 
 
-def create_droplet(snapshot_url: str, user_id: str):
+async def create_droplet(snapshot_url: str, user_id: str):
     if not DO_TOKEN or not SSH_KEY_ID:
         raise HTTPException(status_code=500, detail="DigitalOcean credentials missing")
 
@@ -2517,7 +1863,7 @@ runcmd:
   - nohup /root/stream-logs.sh > /var/log/streaming.log 2>&1 &
 """
 
-    resp = requests.post(
+    resp = await get_http_client().post(
         "https://api.digitalocean.com/v2/droplets",
         headers={"Authorization": f"Bearer {DO_TOKEN}"},
         json={
@@ -2539,8 +1885,8 @@ runcmd:
     return droplet
 
 
-def get_droplet_info(droplet_id: int):
-    resp = requests.get(
+async def get_droplet_info(droplet_id: int):
+    resp = await get_http_client().get(
         f"https://api.digitalocean.com/v2/droplets/{droplet_id}",
         headers={"Authorization": f"Bearer {DO_TOKEN}"}
     )
@@ -2683,8 +2029,8 @@ def fetch_gaia_url(ip: str) -> str:
     except Exception as e:
         raise RuntimeError(f"SSH error: {e}")
 
-def destroy_droplet(droplet_id: int):
-    resp = requests.delete(
+async def destroy_droplet(droplet_id: int):
+    resp = await get_http_client().delete(
         f"https://api.digitalocean.com/v2/droplets/{droplet_id}",
         headers={"Authorization": f"Bearer {DO_TOKEN}"}
     )
@@ -2700,7 +2046,7 @@ async def poll_until_ready(droplet_id: int):
 
     # Wait for droplet to become active
     for attempt in range(20):
-        status, ip, created_at = get_droplet_info(droplet_id)
+        status, ip, created_at = await get_droplet_info(droplet_id)
         DEPLOYMENTS[droplet_id] = {"status": status, "ip": ip, "gaia_url": gaia_url, "created_at": created_at}
         
         if status == "active" and ip:
@@ -2728,14 +2074,15 @@ async def poll_until_ready(droplet_id: int):
     for attempt in range(60):  # 60 attempts * 10s = 10 minutes max
         try:
             # Check installation progress
-            progress = get_installation_progress(ip)
+            # SSH is blocking, so it runs in a worker thread
+            progress = await asyncio.to_thread(get_installation_progress, ip)
             push_log(droplet_id, f"📊 Installation status: {progress}")
             
             if "COMPLETE" in progress:
                 push_log(droplet_id, "✅ Installation completed, looking for Gaia URL...")
                 # Try to get Gaia URL
                 try:
-                    gaia_url = fetch_gaia_url(ip)
+                    gaia_url = await asyncio.to_thread(fetch_gaia_url, ip)
                     if gaia_url:
                         DEPLOYMENTS[droplet_id]["gaia_url"] = gaia_url
                         push_log(droplet_id, f"🎉 Gaia node is ready: {gaia_url}")
@@ -2752,7 +2099,7 @@ async def poll_until_ready(droplet_id: int):
 
         # Check if droplet is still active
         if attempt % 5 == 0:  # Every 50 seconds
-            status, current_ip, created_at = get_droplet_info(droplet_id)
+            status, current_ip, created_at = await get_droplet_info(droplet_id)
             if current_ip != ip or status != "active":
                 push_log(droplet_id, f"⚠️ Droplet status changed: {status}, IP: {current_ip}")
                 ip = current_ip
@@ -2776,21 +2123,8 @@ async def view_logs(droplet_id: int):
         return {"status": "pending", "message": "Droplet IP not available yet"}
     
     try:
-        if SSH_PASSPHRASE:
-            key = paramiko.RSAKey.from_private_key_file(SSH_PRIVATE_KEY, password=SSH_PASSPHRASE)
-        else:
-            key = paramiko.RSAKey.from_private_key_file(SSH_PRIVATE_KEY)
-
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(ip, username=SSH_USER, pkey=key, timeout=15)
-
-        # Get the full installation log
-        stdin, stdout, stderr = ssh.exec_command("cat /var/log/gaianet-detailed-install.log")
-        full_log = stdout.read().decode().strip()
-        error_log = stderr.read().decode().strip()
-        
-        ssh.close()
+        # SSH is blocking, so it runs in a worker thread
+        full_log, error_log = await asyncio.to_thread(fetch_installation_log, ip)
 
         return {
             "status": "success",
@@ -2815,7 +2149,7 @@ async def sse_events(droplet_id: int, request: Request):
         # If we already have a snapshot of state, emit it
         initial = DEPLOYMENTS.get(droplet_id)
         if initial:
-            yield json.dumps({"ts": int(time.time()), "snapshot": initial})
+            yield orjson.dumps({"ts": int(time.time()), "snapshot": initial}).decode()
         try:
             while True:
                 # Client disconnected?
@@ -2839,7 +2173,7 @@ async def websocket_logs(websocket: WebSocket, droplet_id: int):
     # send initial state
     initial = DEPLOYMENTS.get(droplet_id)
     if initial:
-        await websocket.send_text(json.dumps({"ts": int(time.time()), "snapshot": initial}))
+        await websocket.send_text(orjson.dumps({"ts": int(time.time()), "snapshot": initial}).decode())
 
     try:
         while True:
@@ -2849,8 +2183,8 @@ async def websocket_logs(websocket: WebSocket, droplet_id: int):
         pass
 
 @app.post("/deploy")
-def deploy_node(snapshot_url: str, user_id: str, background_tasks: BackgroundTasks):
-    droplet = create_droplet(snapshot_url, user_id)
+async def deploy_node(snapshot_url: str, user_id: str, background_tasks: BackgroundTasks):
+    droplet = await create_droplet(snapshot_url, user_id)
     droplet_id = droplet["id"]
     DEPLOYMENTS[droplet_id] = {"status": droplet["status"], "ip": None, "gaia_url": None, "created_at": droplet["created_at"]}
     # create a log stream queue
@@ -2896,14 +2230,14 @@ def get_droplet_detailed_status(droplet_id: int):
 
 
 @app.delete("/destroy/{droplet_id}")
-def delete_node(droplet_id: int):
-    res = destroy_droplet(droplet_id)
+async def delete_node(droplet_id: int):
+    res = await destroy_droplet(droplet_id)
     DEPLOYMENTS.pop(droplet_id, None)
     # signal end of stream
     q = LOG_STREAMS.pop(droplet_id, None)
     if q:
         try:
-            q.put_nowait(json.dumps({"ts": int(time.time()), "message": "Deployment destroyed."}))
+            q.put_nowait(orjson.dumps({"ts": int(time.time()), "message": "Deployment destroyed."}).decode())
         except Exception:
             pass
     return res
@@ -2933,4 +2267,6 @@ async def stream_logs(request: Request, droplet_id: int):
  
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # uvloop/httptools are the C event loop and parser; keep one worker, since
+    # progress queues and the Qdrant collection state live in this process
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file